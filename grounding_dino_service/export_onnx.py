@@ -0,0 +1,125 @@
+"""
+Grounding DINO ONNX Export
+--------------------------
+Exports IDEA-Research/grounding-dino-base to ONNX for the optional
+ONNX Runtime backend in avatar_detection_server.py.
+
+Usage:
+  pip install -r requirements.txt onnx onnxruntime-gpu
+  python export_onnx.py --output models/grounding_dino.onnx
+  AVATAR_ONNX_MODEL_PATH=models/grounding_dino.onnx python avatar_detection_server.py
+
+CPU hosts:
+  python export_onnx.py --output models/grounding_dino.onnx --int8-output models/grounding_dino.int8.onnx
+  AVATAR_ONNX_INT8_MODEL_PATH=models/grounding_dino.int8.onnx python avatar_detection_server.py
+
+Batch size, image height/width and prompt length are exported as dynamic
+axes, so any screenshot size (and micro-batches of them) works with one graph.
+"""
+import argparse
+import os
+import sys
+
+from prompts import TEXT_PROMPT
+
+MODEL_ID = "IDEA-Research/grounding-dino-base"
+DEFAULT_OUTPUT_PATH = "models/grounding_dino.onnx"
+DEFAULT_OPSET = 17
+SAMPLE_IMAGE_SIZE = (640, 640)
+
+INPUT_NAMES = ["pixel_values", "pixel_mask", "input_ids", "token_type_ids", "attention_mask"]
+OUTPUT_NAMES = ["logits", "pred_boxes"]
+DYNAMIC_AXES = {
+    "pixel_values": {0: "batch", 2: "height", 3: "width"},
+    "pixel_mask": {0: "batch", 1: "height", 2: "width"},
+    "input_ids": {0: "batch", 1: "text_length"},
+    "token_type_ids": {0: "batch", 1: "text_length"},
+    "attention_mask": {0: "batch", 1: "text_length"},
+    # Last axis is the fixed max_text_len (256), not the prompt length
+    "logits": {0: "batch"},
+    "pred_boxes": {0: "batch"},
+}
+
+
+def export(output_path, opset):
+    import torch
+    from PIL import Image
+    from transformers import AutoProcessor, AutoModelForZeroShotObjectDetection
+
+    class DetectionHead(torch.nn.Module):
+        """Return plain tensors so the ONNX graph has named outputs"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, pixel_values, pixel_mask, input_ids, token_type_ids, attention_mask):
+            outputs = self.model(
+                pixel_values=pixel_values,
+                pixel_mask=pixel_mask,
+                input_ids=input_ids,
+                token_type_ids=token_type_ids,
+                attention_mask=attention_mask,
+            )
+            return outputs.logits, outputs.pred_boxes
+
+    print(f"Loading {MODEL_ID}...")
+    processor = AutoProcessor.from_pretrained(MODEL_ID)
+    model = AutoModelForZeroShotObjectDetection.from_pretrained(MODEL_ID).eval()
+
+    sample = processor(images=Image.new("RGB", SAMPLE_IMAGE_SIZE), text=TEXT_PROMPT, return_tensors="pt")
+    args = tuple(sample[name] for name in INPUT_NAMES)
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    print(f"Exporting to {output_path} (opset {opset})...")
+    with torch.no_grad():
+        torch.onnx.export(
+            DetectionHead(model),
+            args,
+            output_path,
+            input_names=INPUT_NAMES,
+            output_names=OUTPUT_NAMES,
+            dynamic_axes=DYNAMIC_AXES,
+            opset_version=opset,
+        )
+    print("✓ Export complete")
+
+
+def quantize_int8(model_path, output_path):
+    """Dynamic INT8 weight quantization of the transformer GEMMs for CPU inference"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    # Only MatMul/Gemm are quantized; the backbone convolutions stay FP32
+    # because ConvInteger falls back to slow reference kernels on most CPU EPs.
+    print(f"Quantizing {model_path} -> {output_path} (INT8 dynamic)...")
+    quantize_dynamic(
+        model_path,
+        output_path,
+        weight_type=QuantType.QInt8,
+        op_types_to_quantize=["MatMul", "Gemm"],
+    )
+    print("✓ Quantization complete")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Grounding DINO to ONNX")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH, help="Output .onnx path")
+    parser.add_argument("--opset", type=int, default=DEFAULT_OPSET, help="ONNX opset version")
+    parser.add_argument("--int8-output", default=None, help="Also write an INT8 dynamic-quantized copy here")
+    args = parser.parse_args()
+
+    try:
+        export(args.output, args.opset)
+        if args.int8_output:
+            quantize_int8(args.output, args.int8_output)
+    except Exception as e:
+        print(f"✗ Export failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""Detection prompt shared by avatar_detection_server.py and export_onnx.py.
+
+Kept free of Flask/torch imports so the exporter can read it without starting
+the server module.
+"""
+
+# Text prompts for avatar detection
+# Grounding DINO uses "." as separator for multiple prompts
+TEXT_PROMPT = "circular profile picture . avatar . small circular photo . profile avatar"
@@ -12,12 +12,19 @@ All images are passed as base64 (data: prefix optional).
 
 from __future__ import annotations
 
-import base64
+import contextlib
+import functools
+import hashlib
 import io
 import logging
 import os
+import queue
+import threading
+import time
 import urllib.request
 import warnings
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 
 import cv2
@@ -27,6 +34,18 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from PIL import Image
 
+try:
+    # SIMD (AVX2/NEON) base64 codec; same API as the stdlib module.
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+try:
+    # Optional: fuses composite_with_alpha into one parallel pass over the pixels.
+    import numba
+except ImportError:
+    numba = None
+
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("photo_magic_ai_service")
@@ -41,13 +60,60 @@ SERVICE_TOKEN = os.environ.get("PHOTO_MAGIC_AI_TOKEN", "").strip()
 
 MAX_IMAGE_BYTES = int(os.environ.get("PHOTO_MAGIC_MAX_IMAGE_BYTES", str(25 * 1024 * 1024)))
 MAX_IMAGE_PIXELS = int(os.environ.get("PHOTO_MAGIC_MAX_IMAGE_PIXELS", "60000000"))
+B64_WHITESPACE = " \t\r\n\v\f"
+B64_WHITESPACE_BYTES = B64_WHITESPACE.encode("ascii")
+# zlib level for response PNGs; 1 is several times faster than the default 6
+# for a small size increase on mostly flat masks and cutouts.
+PNG_COMPRESS_LEVEL = int(os.environ.get("PHOTO_MAGIC_PNG_COMPRESS_LEVEL", "1"))
+# Lossy qualities for the opt-in output_format=webp/jpeg on photo payloads; masks stay PNG.
+WEBP_QUALITY = int(os.environ.get("PHOTO_MAGIC_WEBP_QUALITY", "90"))
+JPEG_QUALITY = int(os.environ.get("PHOTO_MAGIC_JPEG_QUALITY", "92"))
+# Threads for response encoding; cv2.imencode and the base64 codec release the GIL.
+IO_WORKERS = max(1, int(os.environ.get("PHOTO_MAGIC_IO_WORKERS", str(os.cpu_count() or 1))))
+FEATHER_BOX_PASSES = 3
+# Small kernels are cheap as a true Gaussian and too narrow for a box approximation.
+FEATHER_BOX_MIN_PX = 8
+# An elliptic dilate costs O(radius^2) per pixel; from this radius on, a distance
+# transform (constant cost per pixel) is faster for the binary masks we dilate.
+DILATE_DISTANCE_MIN_PX = 24
+LANCZOS_MAX_SCALE = 0.5
+GRAY_CHECK_STRIDE = 8
 
 Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+# OpenCV's equivalent of the PIL decompression-bomb limit (read on first imdecode).
+os.environ.setdefault("OPENCV_IO_MAX_IMAGE_PIXELS", str(MAX_IMAGE_PIXELS))
+# OpenCV >= 4.11 can emit RGB straight from the decoder, saving a full-frame cvtColor.
+IMREAD_COLOR_RGB = getattr(cv2, "IMREAD_COLOR_RGB", None)
 warnings.simplefilter("error", Image.DecompressionBombWarning)
 
 STRICT_MODE = os.environ.get("PHOTO_MAGIC_STRICT", "true").lower() in ("1", "true", "yes")
+# Read when the CUDA caching allocator initializes, so set before any CUDA work.
+# Expandable segments limit fragmentation from concurrent variable-size requests.
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:128")
 DEFAULT_DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 DEVICE = os.environ.get("PHOTO_MAGIC_DEVICE", DEFAULT_DEVICE)
+# Opt-in: compiling and warming RMBG2 adds minutes to every worker's startup on CPU.
+TORCH_COMPILE = os.environ.get("PHOTO_MAGIC_TORCH_COMPILE", "false").lower() in ("1", "true", "yes")
+# Replay RMBG2's fixed-shape forward from a captured CUDA graph (GPU only).
+RMBG2_CUDA_GRAPH = os.environ.get("PHOTO_MAGIC_RMBG2_CUDA_GRAPH", "true").lower() in ("1", "true", "yes")
+RMBG2_GRAPH_WARMUP_ITERS = 3
+# Above 1, concurrent /remove-bg/rmbg2 calls are coalesced into one forward pass of up
+# to this many images, waiting at most RMBG2_BATCH_WAIT_MS for the batch to fill.
+# Batched forwards run eagerly, so this replaces the CUDA graph.
+RMBG2_MAX_BATCH = max(1, int(os.environ.get("PHOTO_MAGIC_RMBG2_MAX_BATCH", "1")))
+RMBG2_BATCH_WAIT_MS = float(os.environ.get("PHOTO_MAGIC_RMBG2_BATCH_WAIT_MS", "8"))
+# "int8": dynamic INT8 quantization of RMBG2's Linear layers on CPU deployments.
+QUANTIZE = os.environ.get("PHOTO_MAGIC_QUANTIZE", "").strip().lower()
+CUDA_DEVICE = torch.device(DEVICE).type == "cuda" and torch.cuda.is_available()
+# Ampere (sm_80) and newer run bf16/TF32 matmuls on Tensor Cores.
+CUDA_BF16 = CUDA_DEVICE and torch.cuda.get_device_properties(torch.device(DEVICE)).major >= 8
+if CUDA_BF16:
+    torch.set_float32_matmul_precision("high")
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+# RMBG2 and SAM2 see fixed input sizes, but LaMa crops vary per request and each new
+# shape would trigger a fresh cuDNN autotune. Opt in for fixed-size traffic.
+torch.backends.cudnn.benchmark = os.environ.get("PHOTO_MAGIC_CUDNN_BENCHMARK", "false").lower() in ("1", "true", "yes")
 
 os.environ.setdefault("HF_HUB_DISABLE_TELEMETRY", "1")
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
@@ -79,10 +145,19 @@ def decode_b64_to_bytes(b64: str, *, max_bytes: int) -> bytes:
     text = strip_data_prefix(b64)
     if not text:
         raise ValueError("Empty input")
-    compact = "".join(text.split())
-    approx_size = (len(compact) * 3) // 4
-    if approx_size > max_bytes + 16:
-        raise ValueError("Input too large")
+    if not text.isascii():
+        raise ValueError("Invalid base64")
+    # Whitespace only shrinks the payload, so the raw length is an upper bound:
+    # normal inputs skip the count, oversized ones are rejected before any copy.
+    if (len(text) * 3) // 4 > max_bytes + 16:
+        payload_len = len(text) - sum(text.count(ch) for ch in B64_WHITESPACE)
+        if (payload_len * 3) // 4 > max_bytes + 16:
+            raise ValueError("Input too large")
+    # Most payloads carry no line breaks; only copy when there is whitespace to drop.
+    if any(ch in text for ch in B64_WHITESPACE):
+        compact = text.encode("ascii").translate(None, B64_WHITESPACE_BYTES)
+    else:
+        compact = text
     try:
         raw = base64.b64decode(compact, validate=True)
     except Exception as e:
@@ -92,54 +167,135 @@ def decode_b64_to_bytes(b64: str, *, max_bytes: int) -> bytes:
     return raw
 
 
-def decode_b64_to_pil(b64: str) -> Image.Image:
-    raw = decode_b64_to_bytes(b64, max_bytes=MAX_IMAGE_BYTES)
+def decode_bytes_to_pil(raw: bytes) -> Image.Image:
     try:
         img = Image.open(io.BytesIO(raw))
-        img.load()
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise ValueError("Image too large") from e
     except Exception as e:
         raise ValueError("Invalid image") from e
+    # Check the header size before decoding any pixels.
     w, h = img.size
     if w <= 0 or h <= 0:
         raise ValueError("Invalid image size")
     if w * h > MAX_IMAGE_PIXELS:
         raise ValueError("Image too large")
-    return img.convert("RGB")
+    # Profiles are never applied here; dropping them also keeps them out of output PNGs.
+    img.info.pop("icc_profile", None)
+    try:
+        img.load()
+    except Exception as e:
+        raise ValueError("Invalid image") from e
+    return img if img.mode == "RGB" else img.convert("RGB")
+
+
+def decode_bytes_to_cv2(raw: bytes, flags: int = cv2.IMREAD_COLOR) -> np.ndarray | None:
+    # cv2 releases the GIL inside imdecode, so threaded workers already decode in parallel.
+    arr = np.frombuffer(raw, dtype=np.uint8)
+    frame = cv2.imdecode(arr, flags)
+    if frame is None:
+        return None
+    h, w = frame.shape[:2]
+    if h <= 0 or w <= 0:
+        raise ValueError("Invalid image size")
+    if h * w > MAX_IMAGE_PIXELS:
+        raise ValueError("Image too large")
+    return frame
+
+
+def decode_b64_to_rgb_np(b64: str) -> np.ndarray:
+    """Decode to an RGB uint8 array via OpenCV (libjpeg-turbo/libpng), falling back to PIL."""
+    raw = decode_b64_to_bytes(b64, max_bytes=MAX_IMAGE_BYTES)
+    to_rgb = IMREAD_COLOR_RGB is not None
+    # Like the PIL decode, keep the stored pixel layout: imdecode would otherwise
+    # apply EXIF orientation, changing output size and misaligning separately
+    # decoded masks.
+    flags = (IMREAD_COLOR_RGB if to_rgb else cv2.IMREAD_COLOR) | cv2.IMREAD_IGNORE_ORIENTATION
+    frame = decode_bytes_to_cv2(raw, flags)
+    if frame is None:
+        # Formats OpenCV can't read (e.g. GIF) still go through PIL.
+        return np.asarray(decode_bytes_to_pil(raw))
+    if to_rgb:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def decode_b64_to_pil(b64: str) -> Image.Image:
+    return Image.fromarray(decode_b64_to_rgb_np(b64))
 
 
 def decode_b64_to_pil_l(b64: str) -> Image.Image:
     raw = decode_b64_to_bytes(b64, max_bytes=MAX_IMAGE_BYTES)
     try:
         img = Image.open(io.BytesIO(raw))
-        img.load()
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise ValueError("Mask too large") from e
     except Exception as e:
         raise ValueError("Invalid mask image") from e
+    # Check the header size before decoding any pixels.
     w, h = img.size
     if w <= 0 or h <= 0:
         raise ValueError("Invalid mask size")
     if w * h > MAX_IMAGE_PIXELS:
         raise ValueError("Mask too large")
-    return img.convert("L")
+    # Profiles are never applied here; dropping them also keeps them out of output PNGs.
+    img.info.pop("icc_profile", None)
+    try:
+        img.load()
+    except Exception as e:
+        raise ValueError("Invalid mask image") from e
+    return img if img.mode == "L" else img.convert("L")
 
 
 def decode_b64_to_cv2_bgr(b64: str) -> np.ndarray:
     raw = decode_b64_to_bytes(b64, max_bytes=MAX_IMAGE_BYTES)
-    arr = np.frombuffer(raw, dtype=np.uint8)
-    frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+    frame = decode_bytes_to_cv2(raw)
     if frame is None:
         raise ValueError("Invalid image")
-    h, w = frame.shape[:2]
-    if h <= 0 or w <= 0:
-        raise ValueError("Invalid image size")
-    if h * w > MAX_IMAGE_PIXELS:
-        raise ValueError("Image too large")
     return frame
 
 
-def pil_to_png_b64(img: Image.Image) -> str:
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
+def pil_to_np_rgb(img: Image.Image) -> np.ndarray:
+    # np.asarray skips the extra copy np.array makes; the result is read-only.
+    return np.asarray(img if img.mode == "RGB" else img.convert("RGB"))
+
+
+IMAGE_ENCODINGS = {
+    "png": (".png", [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESS_LEVEL]),
+    "webp": (".webp", [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY]),
+    "jpeg": (".jpg", [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]),
+}
+# JPEG has no alpha channel, so cutouts only offer the other two.
+CUTOUT_FORMATS = ("png", "webp")
+
+
+def np_to_b64(image: np.ndarray, output_format: str = "png") -> str:
+    """Encode a gray, BGR or BGRA array with OpenCV, skipping the PIL round-trip."""
+    ext, params = IMAGE_ENCODINGS[output_format]
+    ok, buf = cv2.imencode(ext, image, params)
+    if not ok:
+        raise ValueError(f"{output_format.upper()} encode failed")
+    return base64.b64encode(buf).decode("utf-8")
+
+
+def np_to_png_b64(image: np.ndarray) -> str:
+    return np_to_b64(image, "png")
+
+
+io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="photo-magic-io")
+
+
+def encode_images_b64(*items: tuple[np.ndarray, str]) -> list[str]:
+    """Encode (image, output_format) pairs in parallel: the first on this thread, the rest on io_pool."""
+    futures = [io_pool.submit(np_to_b64, image, fmt) for image, fmt in items[1:]]
+    return [np_to_b64(*items[0])] + [f.result() for f in futures]
+
+
+def parse_output_format(data: dict[str, Any], allowed: tuple[str, ...] = tuple(IMAGE_ENCODINGS)) -> str | None:
+    """The requested output_format (default png), or None if it is not one of allowed."""
+    fmt = str(data.get("output_format") or "png").strip().lower()
+    fmt = "jpeg" if fmt == "jpg" else fmt
+    return fmt if fmt in allowed else None
 
 
 def clamp_int(value: Any, lo: int, hi: int) -> int:
@@ -160,96 +316,293 @@ def clamp_float(value: Any, lo: float, hi: float, default: float) -> float:
     return max(lo, min(hi, n))
 
 
+def fit_to_max_side(w: int, h: int, max_side: int) -> tuple[int, int, float]:
+    if max_side <= 0 or max(w, h) <= max_side:
+        return w, h, 1.0
+    scale = max_side / float(max(w, h))
+    return max(1, int(round(w * scale))), max(1, int(round(h * scale))), scale
+
+
 def resize_to_max_side(image: np.ndarray, max_side: int) -> tuple[np.ndarray, float]:
     h, w = image.shape[:2]
-    if max_side <= 0 or max(h, w) <= max_side:
+    new_w, new_h, scale = fit_to_max_side(w, h, max_side)
+    if scale == 1.0:
         return image, 1.0
-    scale = max_side / float(max(h, w))
-    new_w = max(1, int(round(w * scale)))
-    new_h = max(1, int(round(h * scale)))
     resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
     return resized, scale
 
 
+@functools.lru_cache(maxsize=32)
+def _elliptic_kernel(px: int) -> np.ndarray:
+    # Read-only to callers; cv2.dilate never writes to its kernel.
+    return cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (px * 2 + 1, px * 2 + 1))
+
+
 def dilate_mask(mask_u8: np.ndarray, dilate_px: int) -> np.ndarray:
+    """Dilate a binary (0/255) mask by a disc of radius dilate_px."""
     px = max(0, int(dilate_px or 0))
     if px <= 0:
         return mask_u8
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (px * 2 + 1, px * 2 + 1))
-    return cv2.dilate(mask_u8, kernel, iterations=1)
+    if px < DILATE_DISTANCE_MIN_PX:
+        return cv2.dilate(mask_u8, _elliptic_kernel(px), iterations=1)
+    # Pixels within px of the mask; the +0.5 matches the rasterized ellipse's pixel-centre test.
+    dist = cv2.distanceTransform(cv2.bitwise_not(mask_u8), cv2.DIST_L2, cv2.DIST_MASK_5)
+    _, dilated = cv2.threshold(dist, px + 0.5, 255, cv2.THRESH_BINARY_INV)
+    return dilated.astype(np.uint8)
 
 
 def feather_mask(mask_u8: np.ndarray, feather_px: int) -> np.ndarray:
     px = max(0, int(feather_px or 0))
     if px <= 0:
         return mask_u8
-    k = px * 2 + 1
-    blurred = cv2.GaussianBlur(mask_u8, (k, k), 0)
+    if px < FEATHER_BOX_MIN_PX:
+        k = px * 2 + 1
+        return cv2.GaussianBlur(mask_u8, (k, k), 0)
+    # Repeated box blurs converge on a Gaussian, and each boxFilter pass is a
+    # running sum (constant cost per pixel regardless of radius). The box width
+    # matches the variance of the sigma cv2.GaussianBlur derives for (2px+1).
+    sigma = 0.3 * (px - 1) + 0.8
+    box = int(round(np.sqrt(12.0 * sigma * sigma / FEATHER_BOX_PASSES + 1.0)))
+    box = max(3, box | 1)
+    blurred = mask_u8
+    for _ in range(FEATHER_BOX_PASSES):
+        blurred = cv2.boxFilter(blurred, -1, (box, box), borderType=cv2.BORDER_REFLECT_101)
     return blurred
 
 
 def resize_pil_to_max_side(img: Image.Image, max_side: int) -> tuple[Image.Image, float]:
     w, h = img.size
-    if max_side <= 0 or max(w, h) <= max_side:
+    new_w, new_h, scale = fit_to_max_side(w, h, max_side)
+    if scale == 1.0:
         return img, 1.0
-    scale = max_side / float(max(w, h))
-    new_w = max(1, int(round(w * scale)))
-    new_h = max(1, int(round(h * scale)))
-    return img.resize((new_w, new_h), resample=Image.LANCZOS), scale
+    # PIL's BILINEAR widens its support when downscaling, so it still
+    # antialiases; the 6-tap LANCZOS only pays off for large reductions.
+    resample = Image.LANCZOS if scale < LANCZOS_MAX_SCALE else Image.BILINEAR
+    return img.resize((new_w, new_h), resample=resample), scale
 
 
 def mask_bbox(mask_u8: np.ndarray) -> tuple[int, int, int, int] | None:
-    ys, xs = np.where(mask_u8 > 0)
-    if ys.size == 0 or xs.size == 0:
+    # Row/column projections keep peak memory at O(H + W) instead of one int64
+    # coordinate pair per foreground pixel from np.where.
+    rows = np.any(mask_u8, axis=1)
+    if not rows.any():
         return None
-    x1 = int(xs.min())
-    x2 = int(xs.max())
-    y1 = int(ys.min())
-    y2 = int(ys.max())
+    cols = np.any(mask_u8, axis=0)
+    y1 = int(np.argmax(rows))
+    y2 = int(rows.size - 1 - np.argmax(rows[::-1]))
+    x1 = int(np.argmax(cols))
+    x2 = int(cols.size - 1 - np.argmax(cols[::-1]))
     return x1, y1, x2 + 1, y2 + 1
 
 
+if numba is not None:
+
+    @numba.njit(parallel=True, cache=True)
+    def _composite_kernel(base, over, alpha, out):
+        # Same fixed-point rounding as the NumPy path below, one read per pixel.
+        h, w, channels = base.shape
+        for y in numba.prange(h):
+            for x in range(w):
+                a = np.int32(alpha[y, x])
+                for c in range(channels):
+                    t = np.int32(over[y, x, c]) * a + np.int32(base[y, x, c]) * (255 - a) + 128
+                    out[y, x, c] = (t + (t >> 8)) >> 8
+
+else:
+    _composite_kernel = None
+
+
 def composite_with_alpha(base_rgb: np.ndarray, overlay_rgb: np.ndarray, alpha_u8: np.ndarray) -> np.ndarray:
-    alpha = (alpha_u8.astype(np.float32) / 255.0)[..., None]
-    return (overlay_rgb.astype(np.float32) * alpha + base_rgb.astype(np.float32) * (1.0 - alpha)).clip(0, 255).astype(
-        np.uint8
-    )
+    if _composite_kernel is not None:
+        out = np.empty_like(base_rgb)
+        _composite_kernel(base_rgb, overlay_rgb, alpha_u8, out)
+        return out
+    # Fixed-point blend in uint16 (half the bytes of float32): over*a + base*(255-a)
+    # peaks at 255*255 so it cannot overflow, and with t = x + 128,
+    # (t + (t >> 8)) >> 8 == round(x / 255) exactly.
+    alpha = alpha_u8.astype(np.uint16)[..., None]
+    blended = overlay_rgb.astype(np.uint16) * alpha
+    blended += base_rgb.astype(np.uint16) * (255 - alpha)
+    blended += 128
+    blended += blended >> 8
+    blended >>= 8
+    return blended.astype(np.uint8)
+
+
+def inference_autocast(allow_fp16: bool = False):
+    """bf16 autocast on Ampere+ GPUs; with allow_fp16, fp16 on older GPUs; a no-op on CPU."""
+    if CUDA_BF16:
+        return torch.autocast("cuda", dtype=torch.bfloat16)
+    if allow_fp16 and CUDA_DEVICE:
+        return torch.autocast("cuda", dtype=torch.float16)
+    return contextlib.nullcontext()
 
 
 # =============================================================================
 # Model Loading
 # =============================================================================
 
-logger.info("Loading models...")
+# Eager (default): load everything at import, so `gunicorn --preload` on CPU shares
+# the weights copy-on-write across forked workers. Lazy: load on first use in each
+# process, which CUDA deployments need because a CUDA context cannot survive fork().
+LAZY_LOAD = os.environ.get("PHOTO_MAGIC_LAZY_LOAD", "false").lower() in ("1", "true", "yes")
+
+
+def load_once(loader):
+    """Run a model loader at most once per process and cache its availability flag."""
+    lock = threading.Lock()
+    done: list[bool] = []
+
+    @functools.wraps(loader)
+    def wrapper() -> bool:
+        if not done:
+            with lock:
+                if not done:
+                    done.append(loader())
+        return done[0]
+
+    return wrapper
+
 
 # RMBG 2.0
 RMBG2_AVAILABLE = False
 RMBG2_ERROR = None
 rmbg2_model = None
-rmbg2_transform = None
+# Captured forward with its static input/output buffers. Replays overwrite both,
+# so rmbg2_graph_lock is held from the input copy until the output is read.
+rmbg2_graph: dict[str, Any] | None = None
+rmbg2_graph_lock = threading.Lock()
+# Micro-batcher inputs, drained by a per-process worker thread (threads don't survive fork).
+rmbg2_batch_queue: queue.Queue[tuple[torch.Tensor, Future]] = queue.Queue()
+rmbg2_batch_lock = threading.Lock()
+rmbg2_batch_worker_pid: int | None = None
 RMBG2_MODEL_ID = os.environ.get("RMBG2_MODEL_ID", "briaai/RMBG-2.0")
+RMBG2_INPUT_SIZE = (1024, 1024)  # (height, width)
+# NHWC is the native layout of cuDNN's Tensor Core convolutions. GPU preprocessing
+# already yields NHWC strides (a permuted HWC frame), so inputs need no conversion.
+RMBG2_MEMORY_FORMAT = torch.channels_last if CUDA_DEVICE else torch.contiguous_format
+# Pinned uint8 upload buffers reused across requests, one per concurrent upload.
+# Each carries the event of its last async copy, waited on before it is rewritten.
+rmbg2_staging_pool: queue.SimpleQueue[tuple[torch.Tensor, torch.cuda.Event]] = queue.SimpleQueue()
+# ImageNet normalization folded into one multiply-subtract per channel:
+# (x / 255 - mean) / std == x * (1 / (255 * std)) - mean / std
+RMBG2_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+RMBG2_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+RMBG2_PIXEL_SCALE = 1.0 / (255.0 * RMBG2_STD)
+RMBG2_PIXEL_SHIFT = RMBG2_MEAN / RMBG2_STD
+
+
+@load_once
+def load_rmbg2() -> bool:
+    global rmbg2_model, RMBG2_AVAILABLE, RMBG2_ERROR
+    try:
+        from transformers import AutoModelForImageSegmentation
 
-try:
-    from transformers import AutoModelForImageSegmentation
-    from torchvision import transforms
-
-    rmbg2_model = AutoModelForImageSegmentation.from_pretrained(RMBG2_MODEL_ID, trust_remote_code=True)
-    rmbg2_model.to(DEVICE)
-    rmbg2_model.eval()
-
-    rmbg2_transform = transforms.Compose(
-        [
-            transforms.Resize((1024, 1024)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
-        ]
-    )
+        rmbg2_model = AutoModelForImageSegmentation.from_pretrained(RMBG2_MODEL_ID, trust_remote_code=True)
+        rmbg2_model.to(DEVICE, memory_format=RMBG2_MEMORY_FORMAT)
+        rmbg2_model.eval()
+
+        if QUANTIZE == "int8" and torch.device(DEVICE).type == "cpu":
+            try:
+                rmbg2_model = torch.ao.quantization.quantize_dynamic(rmbg2_model, {torch.nn.Linear}, dtype=torch.qint8)
+                logger.info("✓ RMBG2 quantized (int8 dynamic)")
+            except Exception as e:
+                logger.warning("RMBG2 int8 quantization failed, using float weights: %s", e)
+
+        if TORCH_COMPILE:
+            # Preprocessing always yields a fixed-size input, so one compile covers every
+            # request. CUDA-graph modes are avoided: Flask serves requests on many threads.
+            try:
+                compiled_rmbg2 = torch.compile(rmbg2_model)
+                with torch.inference_mode(), inference_autocast(allow_fp16=True):
+                    compiled_rmbg2(rmbg2_blank_input())
+                rmbg2_model = compiled_rmbg2
+                logger.info("✓ RMBG2 compiled")
+            except Exception as e:
+                logger.warning("RMBG2 torch.compile failed, using eager: %s", e)
+
+        if RMBG2_CUDA_GRAPH and CUDA_DEVICE and RMBG2_MAX_BATCH == 1:
+            capture_rmbg2_graph()
+
+        RMBG2_AVAILABLE = True
+        logger.info("✓ RMBG2 loaded")
+    except Exception as e:
+        RMBG2_ERROR = str(e)
+        logger.warning("✗ RMBG2 not available: %s", e)
+    return RMBG2_AVAILABLE
+
+
+def rmbg2_blank_input() -> torch.Tensor:
+    return torch.zeros(1, 3, *RMBG2_INPUT_SIZE, device=DEVICE).contiguous(memory_format=RMBG2_MEMORY_FORMAT)
+
+
+def rmbg2_forward(image_tensor: torch.Tensor) -> torch.Tensor:
+    """Forward pass to a uint8 alpha map, quantized on the device so only 1 byte per pixel is copied back."""
+    out = rmbg2_model(image_tensor)
+    pred = out[-1] if isinstance(out, (list, tuple)) else out
+    # sigmoid stays in [0, 1], so the uint8 cast truncates exactly like np.clip + astype did.
+    return torch.sigmoid(pred.float()).mul_(255.0).to(torch.uint8)
+
+
+def capture_rmbg2_graph() -> None:
+    global rmbg2_graph
+    try:
+        static_input = rmbg2_blank_input()
+        with torch.inference_mode(), inference_autocast(allow_fp16=True):
+            # Warm up on a side stream so lazy cuBLAS/cuDNN setup stays out of the capture.
+            side_stream = torch.cuda.Stream()
+            side_stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(side_stream):
+                for _ in range(RMBG2_GRAPH_WARMUP_ITERS):
+                    rmbg2_forward(static_input)
+            torch.cuda.current_stream().wait_stream(side_stream)
+
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph):
+                static_output = rmbg2_forward(static_input)
+        rmbg2_graph = {"graph": graph, "input": static_input, "output": static_output}
+        logger.info("✓ RMBG2 CUDA graph captured")
+    except Exception as e:
+        rmbg2_graph = None
+        logger.warning("RMBG2 CUDA graph capture failed, using eager: %s", e)
+
+
+def rmbg2_batch_worker() -> None:
+    while True:
+        items = [rmbg2_batch_queue.get()]
+        deadline = time.monotonic() + RMBG2_BATCH_WAIT_MS / 1000.0
+        while len(items) < RMBG2_MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(rmbg2_batch_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        futures = [future for _, future in items]
+        try:
+            with torch.inference_mode(), inference_autocast(allow_fp16=True):
+                preds = rmbg2_forward(torch.cat([tensor for tensor, _ in items])).cpu().numpy()
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            continue
+        for future, pred in zip(futures, preds):
+            future.set_result(pred[0])
+
+
+def rmbg2_batched_forward(image_tensor: torch.Tensor) -> np.ndarray:
+    """Queue one preprocessed input for the micro-batcher and wait for its uint8 map."""
+    global rmbg2_batch_worker_pid
+    with rmbg2_batch_lock:
+        if rmbg2_batch_worker_pid != os.getpid():
+            threading.Thread(target=rmbg2_batch_worker, name="rmbg2-batcher", daemon=True).start()
+            rmbg2_batch_worker_pid = os.getpid()
+    future: Future = Future()
+    rmbg2_batch_queue.put((image_tensor, future))
+    return future.result()
 
-    RMBG2_AVAILABLE = True
-    logger.info("✓ RMBG2 loaded")
-except Exception as e:
-    RMBG2_ERROR = str(e)
-    logger.warning("✗ RMBG2 not available: %s", e)
 
 # SAM2
 SAM2_AVAILABLE = False
@@ -257,59 +610,81 @@ SAM2_ERROR = None
 sam2_predictor = None
 SAM2_CONFIG_NAME = None
 SAM2_WEIGHTS_PATH = None
-try:
-    from sam2.build_sam import build_sam2
-    from sam2.sam2_image_predictor import SAM2ImagePredictor
+# Image-encoder outputs for recently refined images. Point/box refinements on the
+# same image reuse them and run only the cheap mask decoder.
+SAM2_CACHE_SIZE = clamp_int(os.environ.get("PHOTO_MAGIC_SAM2_CACHE_SIZE", "4"), 0, 64)
+sam2_embedding_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+# The predictor holds the current image's features as instance state.
+sam2_lock = threading.Lock()
 
-    SAM2_WEIGHTS_PATH = os.environ.get("SAM2_WEIGHTS_PATH", "weights/sam2_hiera_large.pt")
 
-    def resolve_sam2_config_name() -> str:
-        return os.environ.get("SAM2_CONFIG_NAME") or os.environ.get("SAM2_CONFIG_PATH") or "configs/sam2/sam2_hiera_l.yaml"
+@load_once
+def load_sam2() -> bool:
+    global sam2_predictor, SAM2_AVAILABLE, SAM2_ERROR, SAM2_CONFIG_NAME, SAM2_WEIGHTS_PATH
+    try:
+        from sam2.build_sam import build_sam2
+        from sam2.sam2_image_predictor import SAM2ImagePredictor
 
-    SAM2_CONFIG_NAME = resolve_sam2_config_name()
+        SAM2_WEIGHTS_PATH = os.environ.get("SAM2_WEIGHTS_PATH", "weights/sam2_hiera_large.pt")
 
-    def init_sam2_hydra_with_vendored_configs() -> None:
-        from hydra.core.global_hydra import GlobalHydra
-        from hydra import initialize_config_module
+        def resolve_sam2_config_name() -> str:
+            return os.environ.get("SAM2_CONFIG_NAME") or os.environ.get("SAM2_CONFIG_PATH") or "configs/sam2/sam2_hiera_l.yaml"
 
-        import sam2_configs  # noqa: F401
+        SAM2_CONFIG_NAME = resolve_sam2_config_name()
 
-        GlobalHydra.instance().clear()
-        initialize_config_module("sam2_configs", version_base="1.2")
+        def init_sam2_hydra_with_vendored_configs() -> None:
+            from hydra.core.global_hydra import GlobalHydra
+            from hydra import initialize_config_module
 
-    if os.path.exists(SAM2_WEIGHTS_PATH):
-        try:
-            sam2_model = build_sam2(config_file=SAM2_CONFIG_NAME, ckpt_path=SAM2_WEIGHTS_PATH, device=DEVICE)
-        except Exception as e:
+            import sam2_configs  # noqa: F401
+
+            GlobalHydra.instance().clear()
+            initialize_config_module("sam2_configs", version_base="1.2")
+
+        if os.path.exists(SAM2_WEIGHTS_PATH):
             try:
-                init_sam2_hydra_with_vendored_configs()
                 sam2_model = build_sam2(config_file=SAM2_CONFIG_NAME, ckpt_path=SAM2_WEIGHTS_PATH, device=DEVICE)
-            except Exception as e2:
-                raise RuntimeError(f"SAM2 build failed: {e} (after vendored config init: {e2})") from e2
+            except Exception as e:
+                try:
+                    init_sam2_hydra_with_vendored_configs()
+                    sam2_model = build_sam2(config_file=SAM2_CONFIG_NAME, ckpt_path=SAM2_WEIGHTS_PATH, device=DEVICE)
+                except Exception as e2:
+                    raise RuntimeError(f"SAM2 build failed: {e} (after vendored config init: {e2})") from e2
+
+            sam2_predictor = SAM2ImagePredictor(sam2_model)
+            SAM2_AVAILABLE = True
+            logger.info("✓ SAM2 loaded")
+        else:
+            SAM2_ERROR = f"SAM2 weights not found at {SAM2_WEIGHTS_PATH}"
+            logger.warning("✗ %s", SAM2_ERROR)
+    except Exception as e:
+        SAM2_ERROR = str(e)
+        logger.warning("✗ SAM2 not available: %s", e)
+    return SAM2_AVAILABLE
 
-        sam2_predictor = SAM2ImagePredictor(sam2_model)
-        SAM2_AVAILABLE = True
-        logger.info("✓ SAM2 loaded")
-    else:
-        SAM2_ERROR = f"SAM2 weights not found at {SAM2_WEIGHTS_PATH}"
-        logger.warning("✗ %s", SAM2_ERROR)
-except Exception as e:
-    SAM2_ERROR = str(e)
-    logger.warning("✗ SAM2 not available: %s", e)
 
 # LaMa
 LAMA_AVAILABLE = False
 LAMA_ERROR = None
 lama_model = None
-try:
-    from simple_lama_inpainting import SimpleLama
+# SimpleLama pads inputs to a multiple of this before the forward pass.
+LAMA_PAD_MODULO = 8
+
+
+@load_once
+def load_lama() -> bool:
+    global lama_model, LAMA_AVAILABLE, LAMA_ERROR
+    try:
+        from simple_lama_inpainting import SimpleLama
+
+        lama_model = SimpleLama(device=torch.device(DEVICE))
+        LAMA_AVAILABLE = True
+        logger.info("✓ LaMa loaded")
+    except Exception as e:
+        LAMA_ERROR = str(e)
+        logger.warning("✗ LaMa not available: %s", e)
+    return LAMA_AVAILABLE
 
-    lama_model = SimpleLama(device=torch.device(DEVICE))
-    LAMA_AVAILABLE = True
-    logger.info("✓ LaMa loaded")
-except Exception as e:
-    LAMA_ERROR = str(e)
-    logger.warning("✗ LaMa not available: %s", e)
 
 # Real-ESRGAN (upscale)
 REALESRGAN_AVAILABLE = False
@@ -325,8 +700,21 @@ REALESRGAN_AUTO_DOWNLOAD = os.environ.get("REALESRGAN_AUTO_DOWNLOAD", "true").lo
 REALESRGAN_TILE = clamp_int(os.environ.get("REALESRGAN_TILE", "0"), 0, 2048)
 REALESRGAN_TILE_PAD = clamp_int(os.environ.get("REALESRGAN_TILE_PAD", "10"), 0, 512)
 REALESRGAN_PRE_PAD = clamp_int(os.environ.get("REALESRGAN_PRE_PAD", "0"), 0, 512)
-
-if REALESRGAN_ENABLED:
+# With REALESRGAN_TILE=0, inputs above this many pixels are still tiled so a
+# 4K source cannot exhaust memory; smaller inputs run in one pass.
+REALESRGAN_AUTO_TILE_PIXELS = 1024 * 1024
+REALESRGAN_AUTO_TILE = 512
+REALESRGAN_AUTO_TILE_PAD = 32
+# RealESRGANer keeps per-call state (img, output, tile settings) on the instance.
+realesrgan_lock = threading.Lock()
+
+
+@load_once
+def load_realesrgan() -> bool:
+    global realesrgan_upsampler, REALESRGAN_AVAILABLE, REALESRGAN_ERROR
+    if not REALESRGAN_ENABLED:
+        REALESRGAN_ERROR = "Real-ESRGAN disabled by PHOTO_MAGIC_ENABLE_REALESRGAN=false"
+        return False
     try:
         from basicsr.archs.rrdbnet_arch import RRDBNet
         from realesrgan import RealESRGANer
@@ -358,10 +746,20 @@ if REALESRGAN_ENABLED:
     except (ImportError, FileNotFoundError, RuntimeError) as e:
         REALESRGAN_ERROR = str(e)
         logger.warning("✗ Real-ESRGAN not available: %s", e)
-else:
-    REALESRGAN_ERROR = "Real-ESRGAN disabled by PHOTO_MAGIC_ENABLE_REALESRGAN=false"
+    return REALESRGAN_AVAILABLE
 
-logger.info("Models ready.")
+
+def load_models() -> None:
+    load_rmbg2()
+    load_sam2()
+    load_lama()
+    load_realesrgan()
+
+
+if not LAZY_LOAD:
+    logger.info("Loading models...")
+    load_models()
+    logger.info("Models ready.")
 
 
 def require_ready(models: dict[str, bool]) -> tuple[bool, Any]:
@@ -383,40 +781,143 @@ def require_ready(models: dict[str, bool]) -> tuple[bool, Any]:
     )
 
 
-def rmbg2_predict_mask(pil_image: Image.Image) -> Image.Image:
-    if not RMBG2_AVAILABLE or rmbg2_model is None or rmbg2_transform is None:
+@functools.lru_cache(maxsize=1)
+def _rmbg2_norm_tensors() -> tuple[torch.Tensor, torch.Tensor]:
+    scale = torch.from_numpy(RMBG2_PIXEL_SCALE).view(1, 3, 1, 1).to(DEVICE)
+    shift = torch.from_numpy(RMBG2_PIXEL_SHIFT).view(1, 3, 1, 1).to(DEVICE)
+    return scale, shift
+
+
+def rmbg2_preprocess(rgb: np.ndarray) -> torch.Tensor:
+    """Resize to RMBG2_INPUT_SIZE and normalize into a (1, 3, H, W) float32 tensor on DEVICE."""
+    in_h, in_w = RMBG2_INPUT_SIZE
+    h, w = rgb.shape[:2]
+    interpolation = cv2.INTER_AREA if (w > in_w or h > in_h) else cv2.INTER_LINEAR
+    if CUDA_DEVICE:
+        try:
+            staging, copied = rmbg2_staging_pool.get_nowait()
+            copied.synchronize()
+        except queue.Empty:
+            staging = torch.empty((in_h, in_w, 3), dtype=torch.uint8, pin_memory=True)
+            copied = torch.cuda.Event()
+        # Resize straight into pinned memory, copy the uint8 pixels (a quarter of the
+        # float32 bytes) asynchronously and normalize on the GPU, all on one stream.
+        cv2.resize(rgb, (in_w, in_h), dst=staging.numpy(), interpolation=interpolation)
+        pixels = staging.to(DEVICE, non_blocking=True)
+        copied.record()
+        rmbg2_staging_pool.put((staging, copied))
+        scale, shift = _rmbg2_norm_tensors()
+        return pixels.permute(2, 0, 1).unsqueeze(0).float().mul_(scale).sub_(shift)
+    resized = cv2.resize(rgb, (in_w, in_h), interpolation=interpolation)
+    chw = np.empty((3, in_h, in_w), dtype=np.float32)
+    for c in range(3):
+        np.multiply(resized[..., c], RMBG2_PIXEL_SCALE[c], out=chw[c], dtype=np.float32)
+        chw[c] -= RMBG2_PIXEL_SHIFT[c]
+    return torch.from_numpy(chw).unsqueeze(0).to(DEVICE)
+
+
+def rmbg2_predict_mask(rgb: np.ndarray, out_size: tuple[int, int] | None = None) -> np.ndarray:
+    """Predict a uint8 alpha mask, resized once to out_size (w, h; default: the input size)."""
+    if not RMBG2_AVAILABLE or rmbg2_model is None:
         raise RuntimeError("RMBG2 not available")
 
-    orig_w, orig_h = pil_image.size
-    image_tensor = rmbg2_transform(pil_image).unsqueeze(0).to(DEVICE)
+    out_w, out_h = out_size or (rgb.shape[1], rgb.shape[0])
+    image_tensor = rmbg2_preprocess(rgb)
 
+    if RMBG2_MAX_BATCH > 1:
+        pred_u8 = rmbg2_batched_forward(image_tensor)
+    elif rmbg2_graph is not None:
+        with rmbg2_graph_lock, torch.inference_mode():
+            rmbg2_graph["input"].copy_(image_tensor)
+            rmbg2_graph["graph"].replay()
+            pred_u8 = rmbg2_graph["output"].squeeze().cpu().numpy()
+    else:
+        # RMBG2 is fp16-safe, so pre-Ampere GPUs (no bf16) still get Tensor Core convs.
+        with torch.inference_mode(), inference_autocast(allow_fp16=True):
+            pred_u8 = rmbg2_forward(image_tensor).squeeze().cpu().numpy()
+
+    # Upscaling the 1 MB uint8 map on the CPU beats copying a full-size mask back
+    # for anything above RMBG2_INPUT_SIZE.
+    return cv2.resize(pred_u8, (out_w, out_h), interpolation=cv2.INTER_LINEAR)
+
+
+def lama_inpaint(rgb: np.ndarray, mask_u8: np.ndarray) -> np.ndarray:
+    """Run LaMa on uint8 arrays, calling SimpleLama's TorchScript module directly."""
+    h, w = rgb.shape[:2]
+    module = getattr(lama_model, "model", None)
+    device = getattr(lama_model, "device", None)
+    if module is None or device is None:
+        inpainted = lama_model(Image.fromarray(rgb), Image.fromarray(mask_u8))
+        # SimpleLama pads inputs to a multiple of 8 and returns the padded frame.
+        return pil_to_np_rgb(inpainted)[:h, :w]
+
+    pad_h, pad_w = -h % LAMA_PAD_MODULO, -w % LAMA_PAD_MODULO
+    if pad_h or pad_w:
+        # BORDER_REFLECT repeats the edge pixel, like SimpleLama's np.pad(mode="symmetric").
+        rgb = cv2.copyMakeBorder(rgb, 0, pad_h, 0, pad_w, cv2.BORDER_REFLECT)
+        mask_u8 = cv2.copyMakeBorder(mask_u8, 0, pad_h, 0, pad_w, cv2.BORDER_REFLECT)
+
+    # Upload uint8 and normalize on the device; bring back only the uint8 crop.
     with torch.inference_mode():
-        out = rmbg2_model(image_tensor)
-        pred = out[-1] if isinstance(out, (list, tuple)) else out
-        pred = torch.sigmoid(pred)
-        pred = pred.squeeze().detach().float().cpu().numpy()
-
-    pred_u8 = np.clip(pred * 255.0, 0, 255).astype(np.uint8)
-    mask = Image.fromarray(pred_u8, mode="L").resize((orig_w, orig_h), resample=Image.BILINEAR)
-    return mask
+        image = torch.from_numpy(np.ascontiguousarray(rgb)).to(device)
+        image = image.permute(2, 0, 1).unsqueeze(0).float().div_(255.0)
+        mask = torch.from_numpy(np.ascontiguousarray(mask_u8)).to(device).gt(0).float()[None, None]
+        out = module(image, mask)[0]
+        out_u8 = out.clamp_(0.0, 1.0).mul_(255.0).to(torch.uint8).permute(1, 2, 0)[:h, :w]
+        return out_u8.contiguous().cpu().numpy()
+
+
+def make_cutout_bgra(image: np.ndarray, mask_u8: np.ndarray, color_code: int = cv2.COLOR_BGR2BGRA) -> np.ndarray:
+    bgra = cv2.cvtColor(image, color_code)
+    bgra[..., 3] = mask_u8
+    return bgra
+
+
+def sam2_image_key(image_b64: str, max_side: int) -> str:
+    digest = hashlib.sha1(image_b64.encode("utf-8"), usedforsecurity=False).hexdigest()
+    return f"{digest}:{max_side}"
+
+
+def _sam2_set_image(bgr_image: np.ndarray, image_key: str | None) -> None:
+    """Load the image into the predictor, from the embedding cache when possible (hold sam2_lock)."""
+    # Restoring an embedding writes SAM2ImagePredictor private state, which is only
+    # known to match the sam2 commit pinned in requirements.txt.
+    cached = sam2_embedding_cache.get(image_key) if image_key else None
+    if cached is not None:
+        sam2_embedding_cache.move_to_end(image_key)
+        sam2_predictor._features = cached["features"]
+        sam2_predictor._orig_hw = cached["orig_hw"]
+        sam2_predictor._is_batch = False
+        sam2_predictor._is_image_set = True
+        return
+
+    sam2_predictor.set_image(cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB))
+    if image_key and SAM2_CACHE_SIZE > 0:
+        sam2_embedding_cache[image_key] = {
+            "features": sam2_predictor._features,
+            "orig_hw": sam2_predictor._orig_hw,
+        }
+        while len(sam2_embedding_cache) > SAM2_CACHE_SIZE:
+            sam2_embedding_cache.popitem(last=False)
 
 
-def make_cutout_rgba(pil_rgb: Image.Image, mask_l: Image.Image) -> Image.Image:
-    rgba = pil_rgb.convert("RGBA")
-    rgba.putalpha(mask_l)
-    return rgba
+def sam2_prepare_image(bgr_image: np.ndarray, image_key: str) -> None:
+    if not SAM2_AVAILABLE or sam2_predictor is None:
+        raise RuntimeError("SAM2 not available")
+    with sam2_lock, torch.inference_mode(), inference_autocast():
+        _sam2_set_image(bgr_image, image_key)
 
 
 def sam2_predict_mask_from_points(
     bgr_image: np.ndarray,
     points: list[dict[str, Any]],
     box_xyxy: list[float] | None = None,
+    image_key: str | None = None,
 ) -> np.ndarray:
     if not SAM2_AVAILABLE or sam2_predictor is None:
         raise RuntimeError("SAM2 not available")
 
     h, w = bgr_image.shape[:2]
-    rgb = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB)
 
     coords = []
     labels = []
@@ -432,40 +933,86 @@ def sam2_predict_mask_from_points(
     if not coords:
         raise ValueError("At least one point is required")
 
-    sam2_predictor.set_image(rgb)
-
-    kwargs = {
-        "point_coords": np.array(coords, dtype=np.float32),
-        "point_labels": np.array(labels, dtype=np.int32),
-        "multimask_output": False,
-    }
-    if box_xyxy and len(box_xyxy) == 4:
-        kwargs["box"] = np.array(box_xyxy, dtype=np.float32)
+    point_coords = np.array(coords, dtype=np.float32)
+    point_labels = np.array(labels, dtype=np.int32)
+    box = np.array(box_xyxy, dtype=np.float32) if box_xyxy and len(box_xyxy) == 4 else None
 
-    masks, scores, _ = sam2_predictor.predict(**kwargs)
-    mask = masks[0].astype(np.uint8) * 255
-    return mask
+    with sam2_lock, torch.inference_mode(), inference_autocast():
+        _sam2_set_image(bgr_image, image_key)
+        # predict() upcasts the thresholded masks to float32 before copying them to
+        # the host; calling _predict directly keeps them bool (a quarter of the bytes).
+        _, unnorm_coords, point_labels_t, unnorm_box = sam2_predictor._prep_prompts(
+            point_coords, point_labels, box, None, True
+        )
+        masks, _, _ = sam2_predictor._predict(unnorm_coords, point_labels_t, unnorm_box, None, multimask_output=False)
+        mask_bool = masks[0, 0].cpu().numpy()
+    return mask_bool.view(np.uint8) * 255
 
 
 def enhance_upscale_realesrgan(pil_rgb: Image.Image, outscale: float) -> Image.Image:
     if not REALESRGAN_AVAILABLE or realesrgan_upsampler is None:
         raise RuntimeError("Real-ESRGAN not available")
 
-    np_rgb = np.array(pil_rgb.convert("RGB"))
-    np_bgr = cv2.cvtColor(np_rgb, cv2.COLOR_RGB2BGR)
-    out_bgr, _ = realesrgan_upsampler.enhance(np_bgr, outscale=float(outscale))
-    out_rgb = cv2.cvtColor(out_bgr, cv2.COLOR_BGR2RGB)
-    return Image.fromarray(out_rgb)
+    # RealESRGANer only reads its input (its first step is a float copy), so
+    # reversed-channel views stand in for the RGB<->BGR conversions.
+    np_rgb = pil_to_np_rgb(pil_rgb)
+    h, w = np_rgb.shape[:2]
+    auto_tile = REALESRGAN_TILE == 0 and h * w > REALESRGAN_AUTO_TILE_PIXELS
+    with realesrgan_lock:
+        if auto_tile:
+            realesrgan_upsampler.tile_size = REALESRGAN_AUTO_TILE
+            realesrgan_upsampler.tile_pad = REALESRGAN_AUTO_TILE_PAD
+        try:
+            with torch.inference_mode():
+                out_bgr, _ = realesrgan_upsampler.enhance(np_rgb[..., ::-1], outscale=float(outscale))
+        finally:
+            realesrgan_upsampler.tile_size = REALESRGAN_TILE
+            realesrgan_upsampler.tile_pad = REALESRGAN_TILE_PAD
+    return Image.fromarray(np.ascontiguousarray(out_bgr[..., ::-1]))
+
+
+@functools.lru_cache(maxsize=256)
+def _gamma_lut(gamma: float) -> np.ndarray:
+    # Keyed on gamma rounded to 3 places, well below one 8-bit output step.
+    return (np.power(np.arange(256, dtype=np.float32) / 255.0, gamma) * 255).clip(0, 255).astype(np.uint8)
+
+
+_clahe_local = threading.local()
+
+
+def _clahe(clip_limit: float) -> cv2.CLAHE:
+    # CLAHE keeps scratch buffers between apply() calls, so each request thread
+    # gets its own instances, keyed by the rounded clip limit.
+    cache = getattr(_clahe_local, "by_clip", None)
+    if cache is None:
+        cache = _clahe_local.by_clip = {}
+    clahe = cache.get(clip_limit)
+    if clahe is None:
+        clahe = cache[clip_limit] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(8, 8))
+    return clahe
+
+
+def _is_gray_bgr(np_bgr: np.ndarray) -> bool:
+    # A strided sample rejects colour images cheaply before the exact full-frame check.
+    sample = np_bgr[::GRAY_CHECK_STRIDE, ::GRAY_CHECK_STRIDE]
+    if not (np.array_equal(sample[..., 0], sample[..., 1]) and np.array_equal(sample[..., 1], sample[..., 2])):
+        return False
+    return np.array_equal(np_bgr[..., 0], np_bgr[..., 1]) and np.array_equal(np_bgr[..., 1], np_bgr[..., 2])
 
 
 def _enhance_unsharp(np_bgr: np.ndarray, amount: float, sigma: float) -> np.ndarray:
+    if _is_gray_bgr(np_bgr):
+        # Grayscale screenshots/scans: filter one plane instead of three.
+        gray = _enhance_unsharp(cv2.extractChannel(np_bgr, 0), amount, sigma)
+        return cv2.merge((gray, gray, gray))
+    # GaussianBlur is already separable (fixed-point on 8-bit input), and addWeighted
+    # saturates straight into uint8, so no separate clip/cast pass is needed.
     blurred = cv2.GaussianBlur(np_bgr, (0, 0), sigmaX=max(0.1, sigma))
-    sharpened = cv2.addWeighted(np_bgr, 1.0 + amount, blurred, -amount, 0)
-    return np.clip(sharpened, 0, 255).astype(np.uint8)
+    return cv2.addWeighted(np_bgr, 1.0 + amount, blurred, -amount, 0, dtype=cv2.CV_8U)
 
 
 def enhance_with_opencv(pil_rgb: Image.Image, mode: str, strength: float) -> Image.Image:
-    np_rgb = np.array(pil_rgb.convert("RGB"))
+    np_rgb = pil_to_np_rgb(pil_rgb)
     np_bgr = cv2.cvtColor(np_rgb, cv2.COLOR_RGB2BGR)
     s = float(np.clip(strength, 0.0, 1.0))
 
@@ -490,10 +1037,8 @@ def enhance_with_opencv(pil_rgb: Image.Image, mode: str, strength: float) -> Ima
         else:
             target = 0.58 + (0.12 * s)
             gamma = float(np.clip(np.log(target) / np.log(max(mean_l, 1e-3)), 0.45, 1.35))
-        lut = (np.power(np.arange(256) / 255.0, gamma) * 255).clip(0, 255).astype(np.uint8)
-        l_gamma = cv2.LUT(l_channel, lut)
-        clahe = cv2.createCLAHE(clipLimit=(2.0 + 4.0 * s), tileGridSize=(8, 8))
-        l_enhanced = clahe.apply(l_gamma)
+        l_gamma = cv2.LUT(l_channel, _gamma_lut(round(gamma, 3)))
+        l_enhanced = _clahe(round(2.0 + 4.0 * s, 1)).apply(l_gamma)
         lab_enhanced = cv2.merge((l_enhanced, a_channel, b_channel))
         np_bgr = cv2.cvtColor(lab_enhanced, cv2.COLOR_LAB2BGR)
         np_bgr = cv2.fastNlMeansDenoisingColored(np_bgr, None, int(round(3 + 8 * s)), int(round(3 + 8 * s)), 7, 21)
@@ -506,6 +1051,8 @@ def enhance_with_opencv(pil_rgb: Image.Image, mode: str, strength: float) -> Ima
 
 @app.route("/health", methods=["GET"])
 def health():
+    # No-op once loaded; with PHOTO_MAGIC_LAZY_LOAD the first probe loads the models.
+    load_models()
     payload = {
         "status": "ok" if (RMBG2_AVAILABLE and SAM2_AVAILABLE and LAMA_AVAILABLE) else "not_ready",
         "strict": STRICT_MODE,
@@ -538,7 +1085,7 @@ def health():
 @app.route("/remove-bg/rmbg2", methods=["POST"])
 def remove_bg_rmbg2():
     try:
-        ok, err = require_ready({"rmbg2": RMBG2_AVAILABLE, "sam2": True, "lama": True})
+        ok, err = require_ready({"rmbg2": load_rmbg2(), "sam2": True, "lama": True})
         if not ok:
             return err, 503
 
@@ -549,24 +1096,29 @@ def remove_bg_rmbg2():
 
         max_side = clamp_int(data.get("max_side", 2048), 256, 8192)
         return_mask = bool(data.get("return_mask", True))
+        output_format = parse_output_format(data, CUTOUT_FORMATS)
+        if output_format is None:
+            return jsonify({"error": f"output_format must be one of {', '.join(CUTOUT_FORMATS)}"}), 400
 
-        pil = decode_b64_to_pil(image_b64)
+        rgb = decode_b64_to_rgb_np(image_b64)
+        h0, w0 = rgb.shape[:2]
 
-        w0, h0 = pil.size
-        scale = 1.0
-        if max(w0, h0) > max_side:
-            scale = max_side / float(max(w0, h0))
-            pil_small = pil.resize((int(round(w0 * scale)), int(round(h0 * scale))), resample=Image.LANCZOS)
+        # Preprocessing resizes to RMBG2_INPUT_SIZE anyway, so a max_side at or above
+        # it would only add a resize pass; below it, it still caps the model detail.
+        if max_side < max(RMBG2_INPUT_SIZE):
+            rgb_small, _ = resize_to_max_side(rgb, max_side)
         else:
-            pil_small = pil
+            rgb_small = rgb
 
-        mask_small = rmbg2_predict_mask(pil_small)
-        mask = mask_small.resize((w0, h0), resample=Image.BILINEAR) if scale != 1.0 else mask_small
-        cutout = make_cutout_rgba(pil, mask)
+        mask_u8 = rmbg2_predict_mask(rgb_small, out_size=(w0, h0))
+        cutout = make_cutout_bgra(rgb, mask_u8, cv2.COLOR_RGB2BGRA)
 
-        resp = {"cutout_png": pil_to_png_b64(cutout), "width": w0, "height": h0}
+        # Keys keep their _png names for existing clients; output_format says what's inside.
+        resp = {"width": w0, "height": h0, "output_format": output_format}
         if return_mask:
-            resp["mask_png"] = pil_to_png_b64(mask)
+            resp["cutout_png"], resp["mask_png"] = encode_images_b64((cutout, output_format), (mask_u8, "png"))
+        else:
+            resp["cutout_png"] = np_to_b64(cutout, output_format)
         return jsonify(resp)
     except Exception as e:
         logger.exception("remove-bg/rmbg2 failed")
@@ -576,7 +1128,7 @@ def remove_bg_rmbg2():
 @app.route("/remove-bg/sam2-refine", methods=["POST"])
 def remove_bg_sam2_refine():
     try:
-        ok, err = require_ready({"sam2": SAM2_AVAILABLE})
+        ok, err = require_ready({"sam2": load_sam2()})
         if not ok:
             return err, 503
 
@@ -587,9 +1139,12 @@ def remove_bg_sam2_refine():
         max_side = clamp_int(data.get("max_side", 2048), 256, 8192)
         dilate_px = clamp_int(data.get("mask_dilate_px", 0), 0, 64)
         feather_px = clamp_int(data.get("mask_feather_px", 0), 0, 64)
+        output_format = parse_output_format(data, CUTOUT_FORMATS)
 
         if not image_b64:
             return jsonify({"error": "image is required"}), 400
+        if output_format is None:
+            return jsonify({"error": f"output_format must be one of {', '.join(CUTOUT_FORMATS)}"}), 400
 
         bgr = decode_b64_to_cv2_bgr(image_b64)
         orig_h, orig_w = bgr.shape[:2]
@@ -598,7 +1153,9 @@ def remove_bg_sam2_refine():
         if scale != 1.0 and box and len(box) == 4:
             box = [float(v) * scale for v in box]
 
-        mask_u8 = sam2_predict_mask_from_points(bgr_small, points, box_xyxy=box)
+        mask_u8 = sam2_predict_mask_from_points(
+            bgr_small, points, box_xyxy=box, image_key=sam2_image_key(image_b64, max_side)
+        )
 
         if dilate_px:
             mask_u8 = dilate_mask(mask_u8, dilate_px)
@@ -606,19 +1163,19 @@ def remove_bg_sam2_refine():
         mask_u8_soft = feather_mask(mask_u8, feather_px) if feather_px else mask_u8
 
         if scale != 1.0:
-            mask_u8 = cv2.resize(mask_u8, (orig_w, orig_h), interpolation=cv2.INTER_NEAREST)
+            # Only the soft mask is returned, so the hard one is never upscaled.
             mask_u8_soft = cv2.resize(mask_u8_soft, (orig_w, orig_h), interpolation=cv2.INTER_LINEAR)
 
-        mask_soft_pil = Image.fromarray(mask_u8_soft, mode="L")
-        pil = decode_b64_to_pil(image_b64)
-        cutout = make_cutout_rgba(pil, mask_soft_pil)
+        cutout = make_cutout_bgra(bgr, mask_u8_soft)
+        cutout_png, mask_png = encode_images_b64((cutout, output_format), (mask_u8_soft, "png"))
 
         return jsonify(
             {
-                "mask_png": pil_to_png_b64(mask_soft_pil),
-                "cutout_png": pil_to_png_b64(cutout),
+                "mask_png": mask_png,
+                "cutout_png": cutout_png,
                 "width": orig_w,
                 "height": orig_h,
+                "output_format": output_format,
             }
         )
     except Exception as e:
@@ -626,10 +1183,38 @@ def remove_bg_sam2_refine():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/remove-bg/sam2-prep", methods=["POST"])
+def remove_bg_sam2_prep():
+    """Encode an image ahead of /remove-bg/sam2-refine calls with the same image and max_side."""
+    # Refine finds the embedding by hashing the image it is sent, so there is no id
+    # to hand back; the echoed max_side is the clamped value refine must reuse.
+    try:
+        ok, err = require_ready({"sam2": load_sam2()})
+        if not ok:
+            return err, 503
+
+        data = request.json or {}
+        image_b64 = data.get("image") or ""
+        max_side = clamp_int(data.get("max_side", 2048), 256, 8192)
+
+        if not image_b64:
+            return jsonify({"error": "image is required"}), 400
+
+        bgr = decode_b64_to_cv2_bgr(image_b64)
+        orig_h, orig_w = bgr.shape[:2]
+        bgr_small, _ = resize_to_max_side(bgr, max_side)
+        sam2_prepare_image(bgr_small, sam2_image_key(image_b64, max_side))
+
+        return jsonify({"width": orig_w, "height": orig_h, "max_side": max_side})
+    except Exception as e:
+        logger.exception("remove-bg/sam2-prep failed")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/erase/lama", methods=["POST"])
 def erase_lama():
     try:
-        ok, err = require_ready({"lama": LAMA_AVAILABLE})
+        ok, err = require_ready({"lama": load_lama()})
         if not ok:
             return err, 503
 
@@ -641,26 +1226,23 @@ def erase_lama():
         feather_px = clamp_int(data.get("mask_feather_px", 8), 0, 64)
         crop_to_mask = bool(data.get("crop_to_mask", True))
         crop_margin_px = clamp_int(data.get("crop_margin_px", 128), 0, 2048)
+        # Opt-in: return only the blended crop and where it goes, not the full image.
+        return_patch_only = bool(data.get("return_patch_only", False))
+        output_format = parse_output_format(data)
 
         if not image_b64 or not mask_b64:
             return jsonify({"error": "image and mask are required"}), 400
+        if output_format is None:
+            return jsonify({"error": f"output_format must be one of {', '.join(IMAGE_ENCODINGS)}"}), 400
 
-        pil = decode_b64_to_pil(image_b64)
-        mask_pil = decode_b64_to_pil_l(mask_b64)
-
-        w0, h0 = pil.size
+        # Decode once to arrays; PIL only appears inside lama_inpaint.
+        rgb = decode_b64_to_rgb_np(image_b64)
+        mask_np = np.asarray(decode_b64_to_pil_l(mask_b64))
 
-        scale = 1.0
-        if max(w0, h0) > max_side:
-            scale = max_side / float(max(w0, h0))
-            pil_small = pil.resize((int(round(w0 * scale)), int(round(h0 * scale))), resample=Image.LANCZOS)
-            mask_small = mask_pil.resize((int(round(w0 * scale)), int(round(h0 * scale))), resample=Image.NEAREST)
-        else:
-            pil_small = pil
-            mask_small = mask_pil
-
-        img_np = np.array(pil_small)
-        mask_np = np.array(mask_small)
+        h0, w0 = rgb.shape[:2]
+        img_np, scale = resize_to_max_side(rgb, max_side)
+        if mask_np.shape[:2] != img_np.shape[:2]:
+            mask_np = cv2.resize(mask_np, (img_np.shape[1], img_np.shape[0]), interpolation=cv2.INTER_NEAREST)
         mask_bin = (mask_np > 0).astype(np.uint8) * 255
 
         if dilate_px:
@@ -679,28 +1261,39 @@ def erase_lama():
             x2 = min(img_np.shape[1], x2 + crop_margin_px)
             y2 = min(img_np.shape[0], y2 + crop_margin_px)
 
-            img_crop = Image.fromarray(img_np[y1:y2, x1:x2])
-            mask_crop = Image.fromarray(mask_bin[y1:y2, x1:x2])
+            base_crop = img_np[y1:y2, x1:x2]
             alpha_crop = mask_alpha[y1:y2, x1:x2]
-
-            inpainted_crop = lama_model(img_crop, mask_crop)
-
-            base_crop = np.array(img_crop)
-            over_crop = np.array(inpainted_crop.convert("RGB"))
+            over_crop = lama_inpaint(base_crop, mask_bin[y1:y2, x1:x2])
             blended_crop = composite_with_alpha(base_crop, over_crop, alpha_crop)
 
+            if return_patch_only:
+                patch_bgr = cv2.cvtColor(blended_crop, cv2.COLOR_RGB2BGR)
+                if scale != 1.0:
+                    x1, y1 = int(x1 / scale), int(y1 / scale)
+                    x2, y2 = min(w0, int(np.ceil(x2 / scale))), min(h0, int(np.ceil(y2 / scale)))
+                    patch_bgr = cv2.resize(patch_bgr, (x2 - x1, y2 - y1), interpolation=cv2.INTER_LANCZOS4)
+                return jsonify(
+                    {
+                        "patch_png": np_to_b64(patch_bgr, output_format),
+                        "patch_xyxy": [x1, y1, x2, y2],
+                        "width": w0,
+                        "height": h0,
+                        "output_format": output_format,
+                    }
+                )
+
             out_small = img_np.copy()
             out_small[y1:y2, x1:x2] = blended_crop
         else:
-            inpainted = lama_model(pil_small, Image.fromarray(mask_bin))
-            base = img_np
-            over = np.array(inpainted.convert("RGB"))
-            out_small = composite_with_alpha(base, over, mask_alpha)
+            out_small = composite_with_alpha(img_np, lama_inpaint(img_np, mask_bin), mask_alpha)
 
-        out_pil_small = Image.fromarray(out_small)
-        out_pil = out_pil_small.resize((w0, h0), resample=Image.LANCZOS) if scale != 1.0 else out_pil_small
+        out_bgr = cv2.cvtColor(out_small, cv2.COLOR_RGB2BGR)
+        if scale != 1.0:
+            out_bgr = cv2.resize(out_bgr, (w0, h0), interpolation=cv2.INTER_LANCZOS4)
 
-        return jsonify({"result_png": pil_to_png_b64(out_pil), "width": w0, "height": h0})
+        return jsonify(
+            {"result_png": np_to_b64(out_bgr, output_format), "width": w0, "height": h0, "output_format": output_format}
+        )
     except Exception as e:
         logger.exception("erase/lama failed")
         return jsonify({"error": str(e)}), 500
@@ -722,13 +1315,16 @@ def enhance():
         source_max_side = clamp_int(data.get("source_max_side", 2048), 256, 8192)
         strength = clamp_float(data.get("strength", 0.5), 0.0, 1.0, 0.5)
         upscale_factor = clamp_float(data.get("upscale_factor", 2.0), 1.0, 4.0, 2.0)
+        output_format = parse_output_format(data)
+        if output_format is None:
+            return jsonify({"error": f"output_format must be one of {', '.join(IMAGE_ENCODINGS)}"}), 400
 
         pil = decode_b64_to_pil(image_b64)
         source_w, source_h = pil.size
         model_input, scale = resize_pil_to_max_side(pil, source_max_side)
 
         if mode == "upscale":
-            ok, err = require_ready({"realesrgan": REALESRGAN_AVAILABLE})
+            ok, err = require_ready({"realesrgan": load_realesrgan()})
             if not ok:
                 return err, 503
             outscale = 4.0 if upscale_factor >= 3.0 else 2.0
@@ -748,7 +1344,8 @@ def enhance():
                 "source_height": source_h,
                 "width": out_pil.size[0],
                 "height": out_pil.size[1],
-                "result_png": pil_to_png_b64(out_pil),
+                "result_png": np_to_b64(cv2.cvtColor(pil_to_np_rgb(out_pil), cv2.COLOR_RGB2BGR), output_format),
+                "output_format": output_format,
             }
         )
     except (ValueError, RuntimeError) as e:
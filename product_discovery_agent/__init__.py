@@ -1,6 +1,30 @@
 """Product discovery agent package."""
 
-from .engine import run_product_discovery
-from .models import DiscoveryConfig, ProductDiscoveryReport, StoreScope
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .engine import run_product_discovery
+    from .models import DiscoveryConfig, ProductDiscoveryReport, StoreScope
 
 __all__ = ["run_product_discovery", "DiscoveryConfig", "StoreScope", "ProductDiscoveryReport"]
+
+# Resolved on first attribute access so `python -m product_discovery_agent.cli`
+# does not load the engine just by importing the package.
+_LAZY_EXPORTS = {
+    "run_product_discovery": ".engine",
+    "DiscoveryConfig": ".models",
+    "StoreScope": ".models",
+    "ProductDiscoveryReport": ".models",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,196 @@
+"""Hot scoring and filtering helpers, kept free of I/O and fully annotated.
+
+The module is valid input for mypyc:
+
+    mypyc --follow-imports=silent product_discovery_agent/_fastpath.py
+
+builds an extension module that Python imports in place of this file, so the
+interpreted version below remains the fallback when no compiled build exists.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import functools
+from math import log10
+import re
+from typing import Any
+
+from .constants import (
+    INVENTORY_RECOMMENDATION_THRESHOLDS,
+    MAX_KEYWORD_LENGTH,
+    MIN_KEYWORD_LENGTH,
+    QUALITY_NEGATIVE_TOKEN_PENALTY,
+    QUALITY_NEGATIVE_TOKENS,
+    QUALITY_POSITIVE_TOKEN_BOOST,
+    QUALITY_POSITIVE_TOKENS,
+    QUALITY_SCORE_BASELINE,
+    QUALITY_SCORE_MAX,
+    QUALITY_SCORE_MIN,
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Zero-width lookahead, so a match is tried at every position and overlapping
+# tokens ("officialuxury") each count, like independent substring checks.
+# Only one alternative can match per position: tokens must not be prefixes of
+# one another (tests/test_quality_fit.py checks this against the constants).
+_QUALITY_POS_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(QUALITY_POSITIVE_TOKENS))) + "))"
+)
+_QUALITY_NEG_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(QUALITY_NEGATIVE_TOKENS))) + "))"
+)
+
+
+@dataclass(slots=True)
+class SeedIndex:
+    token_sets: list[tuple[str, frozenset[str]]]
+    all_tokens: frozenset[str]
+
+
+def is_excluded(
+    lower_keyword: str,
+    candidate_tokens: frozenset[str],
+    excluded_keywords: set[str],
+    *,
+    excluded_token_sets: list[frozenset[str]],
+    excluded_automaton: Any = None,
+) -> bool:
+    if not excluded_keywords:
+        return False
+    if excluded_automaton is not None:
+        if next(excluded_automaton.iter(lower_keyword), None) is not None:
+            return True
+    elif any(excluded in lower_keyword for excluded in excluded_keywords):
+        return True
+    return any(excluded_tokens <= candidate_tokens for excluded_tokens in excluded_token_sets)
+
+
+def build_seed_index(seed_keywords: list[str]) -> SeedIndex:
+    token_sets: list[tuple[str, frozenset[str]]] = []
+    for seed_keyword in seed_keywords:
+        seed_lower = seed_keyword.lower()
+        seed_tokens = keyword_tokens(seed_lower)
+        if seed_tokens:
+            token_sets.append((seed_lower, seed_tokens))
+    return SeedIndex(
+        token_sets=token_sets,
+        all_tokens=frozenset().union(*(tokens for _, tokens in token_sets)),
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def keyword_tokens(text: str) -> frozenset[str]:
+    return frozenset(_TOKEN_RE.findall(text))
+
+
+def keyword_relevance(
+    candidate_lower: str,
+    candidate_tokens: frozenset[str],
+    seed_index: SeedIndex,
+) -> float:
+    if not candidate_tokens:
+        return 0.0
+
+    # Most trend records share no token with any seed; only the substring
+    # fallback can score those, so skip the per-seed intersections.
+    if candidate_tokens.isdisjoint(seed_index.all_tokens):
+        for seed_lower, _ in seed_index.token_sets:
+            if seed_lower in candidate_lower or candidate_lower in seed_lower:
+                return 0.35
+        return 0.0
+
+    best_score = 0.0
+    for seed_lower, seed_tokens in seed_index.token_sets:
+        overlap = len(candidate_tokens.intersection(seed_tokens))
+        if overlap > 0:
+            token_ratio = overlap / len(seed_tokens)
+            best_score = max(best_score, token_ratio)
+        elif seed_lower in candidate_lower or candidate_lower in seed_lower:
+            best_score = max(best_score, 0.35)
+
+    return min(1.0, best_score)
+
+
+def score_quality_fit(*, keyword_lower: str, positioning_mode: str) -> float:
+    # Each token counts once, however often it repeats in the keyword.
+    pos_hits = len(set(_QUALITY_POS_RE.findall(keyword_lower)))
+    neg_hits = len(set(_QUALITY_NEG_RE.findall(keyword_lower)))
+    # Require stronger curation standards for quality-focused stores.
+    neg_weight = 2 if positioning_mode == "quality" else 1
+    score = (
+        QUALITY_SCORE_BASELINE
+        + pos_hits * QUALITY_POSITIVE_TOKEN_BOOST
+        - neg_hits * QUALITY_NEGATIVE_TOKEN_PENALTY * neg_weight
+    )
+    return clamp(score, lower=QUALITY_SCORE_MIN, upper=QUALITY_SCORE_MAX)
+
+
+def inventory_recommendation(
+    *,
+    total_score: float,
+    sustained_score: float,
+    marketplace_score: float,
+    quality_fit_score: float,
+    positioning_mode: str,
+) -> str:
+    quality_required = positioning_mode == "quality"
+
+    add_now_quality_ok = (
+        quality_fit_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["add_now_quality_min"]
+    ) if quality_required else True
+    if (
+        total_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["add_now_total_min"]
+        and sustained_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["add_now_sustained_min"]
+        and marketplace_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["add_now_marketplace_min"]
+        and add_now_quality_ok
+    ):
+        return "add_now"
+
+    test_quality_ok = (
+        quality_fit_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["test_batch_quality_min"]
+    ) if quality_required else True
+    if (
+        total_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["test_batch_total_min"]
+        and sustained_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["test_batch_sustained_min"]
+        and test_quality_ok
+    ):
+        return "test_small_batch"
+
+    if total_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["watchlist_total_min"]:
+        return "watchlist"
+    return "reject"
+
+
+@functools.lru_cache(maxsize=8192)
+def normalize_and_key(keyword: str) -> tuple[str, str] | None:
+    # The same suggestion often arrives from several sources; normalize it once.
+    normalized = normalize_keyword(keyword)
+    if not normalized:
+        return None
+    return normalized, normalized.casefold()
+
+
+def normalize_keyword(keyword: str) -> str:
+    collapsed = " ".join(keyword.split())
+    if not collapsed:
+        return ""
+    if len(collapsed) < MIN_KEYWORD_LENGTH:
+        return ""
+    if len(collapsed) > MAX_KEYWORD_LENGTH:
+        return collapsed[:MAX_KEYWORD_LENGTH].rstrip()
+    return collapsed
+
+
+def log_scaled(value: int) -> float:
+    if value <= 0:
+        return 0.0
+    return min(1.0, log10(value + 1) / 6.0)
+
+
+def clamp(value: float, *, lower: float, upper: float) -> float:
+    if value < lower:
+        return lower
+    if value > upper:
+        return upper
+    return value
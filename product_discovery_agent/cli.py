@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import os
 import re
-from pathlib import Path
+import sys
 
-from .constants import (
+from .constants_cli import (
     DEFAULT_MARKETPLACES,
     DEFAULT_MAX_MARKETPLACE_TERMS,
+    DEFAULT_MAX_PARALLEL_FETCHES,
     DEFAULT_MAX_SAMPLE_PRODUCTS,
     DEFAULT_MAX_SUSTAINED_TREND_TERMS,
     DEFAULT_MAX_SUGGESTIONS_PER_SOURCE,
@@ -16,24 +19,52 @@ from .constants import (
     DEFAULT_POSITIONING_MODE,
     DEFAULT_TARGET_PRICING_STORE_ID,
     DEFAULT_TREND_TIME_WINDOW,
+    PACKAGE_VERSION,
     SUPPORTED_MARKETPLACES,
     SUPPORTED_POSITIONING_MODES,
 )
-from .engine import run_product_discovery
-from .models import DiscoveryConfig, StoreScope
-from .reporter import write_reports
+
+VERSION_FLAGS = frozenset({"--version", "-V"})
+# Validated in this order after parsing; the first failure is reported.
+POSITIVE_INT_FLAGS = (
+    "--max-suggestions-per-source",
+    "--max-trend-items",
+    "--max-sustained-trend-terms",
+    "--max-marketplace-terms",
+    "--max-sample-products",
+    "--max-parallel-fetches",
+    "--timeout-seconds",
+)
+NON_EMPTY_STRING_FLAGS = ("--trend-time-window", "--target-pricing-store-id")
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+_SORTED_POSITIONING_MODES = tuple(sorted(SUPPORTED_POSITIONING_MODES))
+_SUPPORTED_MARKETPLACES_HELP = ", ".join(sorted(SUPPORTED_MARKETPLACES))
 
 
+@functools.lru_cache(maxsize=1)
 def build_parser() -> argparse.ArgumentParser:
+    """Shared, memoized parser. Reuse it from one thread at a time; callers that
+    need their own instance (or to modify it) should use _uncached_build_parser."""
+    return _uncached_build_parser()
+
+
+def _uncached_build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description=(
             "Find product opportunities relevant to a store profile using "
             "search trends, marketplace signals, and demand expansions."
         )
     )
+    parser.add_argument(
+        "--version",
+        "-V",
+        action="version",
+        version=f"product-discovery-agent {PACKAGE_VERSION}",
+    )
     parser.add_argument(
         "--store-name",
         required=True,
+        type=_clean,
         help="Human-readable store name used in report metadata.",
     )
     parser.add_argument(
@@ -51,7 +82,7 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--positioning-mode",
         default=DEFAULT_POSITIONING_MODE,
-        choices=sorted(SUPPORTED_POSITIONING_MODES),
+        choices=_SORTED_POSITIONING_MODES,
         help=(
             "Store positioning strategy. "
             "Use 'quality' to bias recommendations toward high-quality market fit."
@@ -75,11 +106,13 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--geo",
         default="US",
+        type=_clean_upper,
         help="Geo code for trend collection, e.g. US, AE, GB.",
     )
     parser.add_argument(
         "--language",
         default="en-US",
+        type=_clean,
         help="Language tag for search suggestion APIs.",
     )
     parser.add_argument(
@@ -88,7 +121,7 @@ def build_parser() -> argparse.ArgumentParser:
         default=[],
         help=(
             "Marketplace adapter to scan. "
-            f"Supported: {', '.join(sorted(SUPPORTED_MARKETPLACES))}. "
+            f"Supported: {_SUPPORTED_MARKETPLACES_HELP}. "
             "Repeat for multiple marketplaces."
         ),
     )
@@ -122,14 +155,22 @@ def build_parser() -> argparse.ArgumentParser:
         default=DEFAULT_MAX_SAMPLE_PRODUCTS,
         help="Maximum sample product titles to capture per marketplace query.",
     )
+    parser.add_argument(
+        "--max-parallel-fetches",
+        type=int,
+        default=DEFAULT_MAX_PARALLEL_FETCHES,
+        help="Maximum upstream requests (suggestions, marketplace scans) in flight at once.",
+    )
     parser.add_argument(
         "--trend-time-window",
         default=DEFAULT_TREND_TIME_WINDOW,
+        type=_clean,
         help='Google Trends time window for sustained analysis, e.g. "today 12-m".',
     )
     parser.add_argument(
         "--target-pricing-store-id",
         default=DEFAULT_TARGET_PRICING_STORE_ID,
+        type=_clean,
         help="Target pricing store ID for marketplace lookups.",
     )
     parser.add_argument(
@@ -151,34 +192,37 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    # Answer --version before the parser with its ~20 arguments is built.
+    options = argv[: argv.index("--")] if "--" in argv else argv
+    if not VERSION_FLAGS.isdisjoint(options):
+        print(f"product-discovery-agent {PACKAGE_VERSION}")
+        return 0
+
     parser = build_parser()
-    args = parser.parse_args()
-
-    if args.max_suggestions_per_source <= 0:
-        parser.error("--max-suggestions-per-source must be greater than 0")
-    if args.max_trend_items <= 0:
-        parser.error("--max-trend-items must be greater than 0")
-    if args.max_sustained_trend_terms <= 0:
-        parser.error("--max-sustained-trend-terms must be greater than 0")
-    if args.max_marketplace_terms <= 0:
-        parser.error("--max-marketplace-terms must be greater than 0")
-    if args.max_sample_products <= 0:
-        parser.error("--max-sample-products must be greater than 0")
-    if args.timeout_seconds <= 0:
-        parser.error("--timeout-seconds must be greater than 0")
-    if not args.trend_time_window or not args.trend_time_window.strip():
-        parser.error("--trend-time-window cannot be empty")
-    if not args.target_pricing_store_id or not args.target_pricing_store_id.strip():
-        parser.error("--target-pricing-store-id cannot be empty")
+    args = parser.parse_args(argv)
+
+    for flag in POSITIVE_INT_FLAGS:
+        if getattr(args, _dest(flag)) <= 0:
+            parser.error(f"{flag} must be greater than 0")
+    for flag in NON_EMPTY_STRING_FLAGS:
+        if not getattr(args, _dest(flag)):
+            parser.error(f"{flag} cannot be empty")
 
     marketplaces = _resolve_marketplaces(args.marketplace)
     seed_keywords = [value for value in args.seed_keyword if value and value.strip()]
     if not seed_keywords:
         parser.error("At least one non-empty --seed-keyword is required")
 
+    # Imported only once arguments are valid, so --help and usage errors skip
+    # loading the discovery pipeline.
+    from .engine import run_product_discovery
+    from .models import DiscoveryConfig, StoreScope
+    from .reporter import write_reports
+
     scope = StoreScope(
-        store_name=args.store_name.strip(),
+        store_name=args.store_name,
         seed_keywords=seed_keywords,
         tenant_id=args.tenant_id,
         account_id=args.account_id,
@@ -187,16 +231,17 @@ def main() -> int:
         excluded_keywords=[value for value in args.exclude_keyword if value and value.strip()],
     )
     config = DiscoveryConfig(
-        geo=args.geo.strip().upper(),
-        language=args.language.strip(),
+        geo=args.geo,
+        language=args.language,
         marketplaces=marketplaces,
         max_suggestions_per_source=args.max_suggestions_per_source,
         max_trend_items=args.max_trend_items,
         max_sustained_trend_terms=args.max_sustained_trend_terms,
         max_marketplace_terms=args.max_marketplace_terms,
         max_sample_products=args.max_sample_products,
-        trend_time_window=args.trend_time_window.strip(),
-        target_pricing_store_id=args.target_pricing_store_id.strip(),
+        max_parallel_fetches=args.max_parallel_fetches,
+        trend_time_window=args.trend_time_window,
+        target_pricing_store_id=args.target_pricing_store_id,
         timeout_seconds=args.timeout_seconds,
     )
 
@@ -208,13 +253,21 @@ def main() -> int:
         file_stem=file_stem,
     )
 
-    print(f"Product discovery complete for store: {scope.store_name}")
-    print(f"Opportunities identified: {len(report.opportunities)}")
-    print(f"Trend matches retained: {len(report.trend_signals)}")
-    print(f"Sustained trend signals: {len(report.sustained_trend_signals)}")
-    print(f"Warnings: {len(report.warnings)}")
-    print(f"JSON report: {Path(json_path).resolve()}")
-    print(f"Markdown report: {Path(md_path).resolve()}")
+    # One write for the whole summary instead of a locked write per line.
+    print(
+        "\n".join(
+            (
+                f"Product discovery complete for store: {scope.store_name}",
+                f"Opportunities identified: {len(report.opportunities)}",
+                f"Trend matches retained: {len(report.trend_signals)}",
+                f"Sustained trend signals: {len(report.sustained_trend_signals)}",
+                f"Warnings: {len(report.warnings)}",
+                # abspath is lexical; the files were just written, so no stat/symlink walk.
+                f"JSON report: {os.path.abspath(json_path)}",
+                f"Markdown report: {os.path.abspath(md_path)}",
+            )
+        )
+    )
 
     return 0
 
@@ -223,27 +276,35 @@ def _resolve_marketplaces(raw_values: list[str]) -> tuple[str, ...]:
     if not raw_values:
         return tuple(DEFAULT_MARKETPLACES)
 
-    flattened: list[str] = []
-    for value in raw_values:
-        flattened.extend(part.strip().lower() for part in value.split(","))
-    normalized = [value for value in flattened if value]
-    deduped: list[str] = []
-    for value in normalized:
-        if value not in deduped:
-            deduped.append(value)
+    # One pass over the comma-split parts; dict.fromkeys keeps first-seen order.
+    parts = (part.strip().lower() for value in raw_values for part in value.split(","))
+    deduped = list(dict.fromkeys(part for part in parts if part))
 
     unsupported = [value for value in deduped if value not in SUPPORTED_MARKETPLACES]
     if unsupported:
         unsupported_str = ", ".join(unsupported)
-        supported_str = ", ".join(sorted(SUPPORTED_MARKETPLACES))
         raise SystemExit(
-            f"Unsupported marketplaces: {unsupported_str}. Supported values: {supported_str}."
+            f"Unsupported marketplaces: {unsupported_str}. "
+            f"Supported values: {_SUPPORTED_MARKETPLACES_HELP}."
         )
     return tuple(deduped)
 
 
+# argparse type= callables: normalize once at parse time (defaults included).
+def _clean(value: str) -> str:
+    return value.strip()
+
+
+def _clean_upper(value: str) -> str:
+    return value.strip().upper()
+
+
+def _dest(flag: str) -> str:
+    return flag.lstrip("-").replace("-", "_")
+
+
 def _default_file_stem(*, store_name: str) -> str:
-    normalized = re.sub(r"[^a-z0-9]+", "-", store_name.lower()).strip("-")
+    normalized = _SLUG_RE.sub("-", store_name.lower()).strip("-")
     return f"product-discovery-{normalized or 'store'}"
 
 
@@ -2,29 +2,39 @@
 
 from __future__ import annotations
 
+# CLI defaults live in constants_cli so argument parsing does not build the
+# analysis tables below; re-exported here for the rest of the package.
+from .constants_cli import (  # noqa: F401
+    DEFAULT_MARKETPLACES,
+    DEFAULT_MAX_MARKETPLACE_TERMS,
+    DEFAULT_MAX_PARALLEL_FETCHES,
+    DEFAULT_MAX_SAMPLE_PRODUCTS,
+    DEFAULT_MAX_SUGGESTIONS_PER_SOURCE,
+    DEFAULT_MAX_SUSTAINED_TREND_TERMS,
+    DEFAULT_MAX_TREND_ITEMS,
+    DEFAULT_POSITIONING_MODE,
+    DEFAULT_TARGET_PRICING_STORE_ID,
+    DEFAULT_TREND_TIME_WINDOW,
+    PACKAGE_VERSION,
+    SUPPORTED_MARKETPLACES,
+    SUPPORTED_POSITIONING_MODES,
+)
+
 DEFAULT_REQUEST_TIMEOUT_SECONDS = 15
 DEFAULT_USER_AGENT = (
-    "VironaProductDiscoveryAgent/1.0 "
+    f"VironaProductDiscoveryAgent/{PACKAGE_VERSION} "
     "(+https://virona.local/product-discovery)"
 )
 
 DEFAULT_GEO = "US"
 DEFAULT_LANGUAGE = "en-US"
-DEFAULT_POSITIONING_MODE = "balanced"
-SUPPORTED_POSITIONING_MODES = frozenset({"balanced", "quality"})
-
-DEFAULT_MAX_SUGGESTIONS_PER_SOURCE = 12
-DEFAULT_MAX_TREND_ITEMS = 80
-DEFAULT_MAX_MARKETPLACE_TERMS = 12
-DEFAULT_MAX_SAMPLE_PRODUCTS = 5
-DEFAULT_MAX_SUSTAINED_TREND_TERMS = 8
-DEFAULT_TREND_TIME_WINDOW = "today 12-m"
-DEFAULT_TARGET_PRICING_STORE_ID = "3991"
 DEFAULT_TARGET_API_KEY_FALLBACK = "9f36aeafbe60771e321a7cc95a78140772ab3e96"
 MAX_SUSTAINED_TREND_FETCH_FAILURES = 2
-
-DEFAULT_MARKETPLACES = ("amazon", "walmart", "target")
-SUPPORTED_MARKETPLACES = frozenset(DEFAULT_MARKETPLACES)
+# Google Trends rate-limits aggressively, so timeseries fetches use fewer workers.
+MAX_PARALLEL_TIMESERIES_FETCHES = 4
+# Process-wide timeseries cache shared by overlapping runs and tenants.
+TIMESERIES_CACHE_MAX_ENTRIES = 2048
+TIMESERIES_CACHE_TTL_SECONDS = 60 * 60
 
 ALLOWED_SOURCE_HOSTS = frozenset(
     {
@@ -0,0 +1,20 @@
+"""Constants needed to build the CLI parser, kept free of the analysis tables."""
+
+from __future__ import annotations
+
+PACKAGE_VERSION = "1.0"
+
+DEFAULT_POSITIONING_MODE = "balanced"
+SUPPORTED_POSITIONING_MODES = frozenset({"balanced", "quality"})
+
+DEFAULT_MAX_SUGGESTIONS_PER_SOURCE = 12
+DEFAULT_MAX_TREND_ITEMS = 80
+DEFAULT_MAX_MARKETPLACE_TERMS = 12
+DEFAULT_MAX_SAMPLE_PRODUCTS = 5
+DEFAULT_MAX_SUSTAINED_TREND_TERMS = 8
+DEFAULT_TREND_TIME_WINDOW = "today 12-m"
+DEFAULT_TARGET_PRICING_STORE_ID = "3991"
+DEFAULT_MAX_PARALLEL_FETCHES = 8
+
+DEFAULT_MARKETPLACES = ("amazon", "walmart", "target")
+SUPPORTED_MARKETPLACES = frozenset(DEFAULT_MARKETPLACES)
@@ -2,30 +2,38 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from math import log10
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+import heapq
 import re
+import threading
+import time
+from typing import Callable
+
+try:
+    # Optional: matches every excluded phrase in one C-level pass per keyword.
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    # Optional: scores every shortlisted keyword's marketplace snapshots in one pass.
+    import numpy as np
+except ImportError:
+    np = None
 
 from .constants import (
     COMPONENT_SCORE_CAP,
-    INVENTORY_RECOMMENDATION_THRESHOLDS,
     MARKETPLACE_COVERAGE_WEIGHT,
     MARKETPLACE_RESULT_CAP,
     MARKETPLACE_RESULTS_WEIGHT,
     MARKETPLACE_SAMPLE_TITLES_WEIGHT,
+    MAX_PARALLEL_TIMESERIES_FETCHES,
     MAX_SUSTAINED_TREND_FETCH_FAILURES,
-    MAX_KEYWORD_LENGTH,
     MAX_SEED_KEYWORDS,
-    MIN_KEYWORD_LENGTH,
     MIN_RELEVANCE_FOR_SUSTAINED_TRENDS,
     MIN_RELEVANCE_FOR_TRENDS,
-    QUALITY_NEGATIVE_TOKEN_PENALTY,
-    QUALITY_NEGATIVE_TOKENS,
-    QUALITY_POSITIVE_TOKEN_BOOST,
-    QUALITY_POSITIVE_TOKENS,
-    QUALITY_SCORE_BASELINE,
-    QUALITY_SCORE_MAX,
-    QUALITY_SCORE_MIN,
     SEARCH_RANK_MULTIPLIER,
     SEARCH_SOURCE_WEIGHTS,
     SUPPORTED_MARKETPLACES,
@@ -33,6 +41,8 @@ from .constants import (
     SUSTAINED_TREND_BASELINE_POINTS,
     SUSTAINED_TREND_MIN_POINTS,
     SUSTAINED_TREND_RECENT_POINTS,
+    TIMESERIES_CACHE_MAX_ENTRIES,
+    TIMESERIES_CACHE_TTL_SECONDS,
     TREND_RELEVANCE_MULTIPLIER,
     TREND_TRAFFIC_MULTIPLIER,
     WEIGHTED_SCORE_WEIGHTS,
@@ -50,6 +60,7 @@ from .models import (
 )
 from .sources import (
     Fetcher,
+    MarketplaceScanResult,
     build_fetcher,
     fetch_amazon_suggestions,
     fetch_google_suggestions,
@@ -59,19 +70,128 @@ from .sources import (
     scan_target_marketplace,
     scan_walmart_marketplace,
 )
-from .sustained import compute_sustained_trend_metrics
+from ._fastpath import (
+    SeedIndex,
+    build_seed_index,
+    inventory_recommendation,
+    is_excluded,
+    keyword_relevance,
+    keyword_tokens,
+    log_scaled,
+    normalize_and_key,
+    normalize_keyword,
+    score_quality_fit,
+)
+from .sustained_numba import compute_sustained_trend_metrics_batch
+
+# Uniform keyword-only signature so every scan can be submitted the same way.
+_MARKETPLACE_ADAPTERS: dict[str, Callable[..., MarketplaceScanResult]] = {
+    "amazon": lambda *, keyword, max_sample_products, target_pricing_store_id, fetcher: (
+        scan_amazon_marketplace(
+            keyword=keyword,
+            max_sample_products=max_sample_products,
+            fetcher=fetcher,
+        )
+    ),
+    "walmart": lambda *, keyword, max_sample_products, target_pricing_store_id, fetcher: (
+        scan_walmart_marketplace(
+            keyword=keyword,
+            max_sample_products=max_sample_products,
+            fetcher=fetcher,
+        )
+    ),
+    "target": lambda *, keyword, max_sample_products, target_pricing_store_id, fetcher: (
+        scan_target_marketplace(
+            keyword=keyword,
+            max_sample_products=max_sample_products,
+            pricing_store_id=target_pricing_store_id,
+            fetcher=fetcher,
+        )
+    ),
+}
+# Failures that will repeat for every keyword, so the marketplace is skipped after one.
+_DISABLE_MARKETPLACE_RE = re.compile(
+    "|".join(
+        map(
+            re.escape,
+            (
+                "missing __next_data__ script",
+                "missing api key",
+                "http error 403",
+                "http error 429",
+                "precondition failed",
+                "access denied",
+                "pardon our interruption",
+            ),
+        )
+    )
+)
+# Bits follow alphabetical order so decoding a mask yields sorted source names.
+_SOURCE_NAMES = (
+    "amazon_suggest",
+    "google_suggest",
+    "google_trends_rss",
+    "google_trends_timeseries",
+    "seed_keyword",
+)
+_SOURCE_BITS = {name: 1 << index for index, name in enumerate(_SOURCE_NAMES)}
+
 
-_TOKEN_RE = re.compile(r"[a-z0-9]+")
-_WHITESPACE_RE = re.compile(r"\s+")
+class _TimeseriesCache:
+    """Bounded LRU of Google Trends timeseries whose entries expire after a TTL.
+
+    Shared by every run in the process, so overlapping seeds across runs and
+    tenants reuse one fetch. Timeseries fetches run on pool threads, hence the lock.
+    """
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, str, str, str], tuple[float, tuple[int, ...]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str, str, str]) -> tuple[int, ...] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return values
+
+    def put(self, key: tuple[str, str, str, str], values: tuple[int, ...]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_TIMESERIES_CACHE = _TimeseriesCache(
+    max_entries=TIMESERIES_CACHE_MAX_ENTRIES,
+    ttl_seconds=TIMESERIES_CACHE_TTL_SECONDS,
+)
 
 
 @dataclass(slots=True)
 class _CandidateAccumulator:
     keyword: str
+    key: str
+    keyword_lower: str
+    tokens: frozenset[str]
     search_points: float = 0.0
     trend_points: float = 0.0
     sustained_points: float = 0.0
-    sources: set[str] = field(default_factory=set)
+    sources: int = 0
     trend_hits: int = 0
     max_trend_traffic_estimate: int = 0
     sustained_direction: str | None = None
@@ -91,6 +211,7 @@ def run_product_discovery(
     if len(seed_keywords) > MAX_SEED_KEYWORDS:
         raise ValueError(f"A maximum of {MAX_SEED_KEYWORDS} seed keywords is supported.")
 
+    seed_index = build_seed_index(seed_keywords)
     excluded_keywords = _normalize_exclusions(scope.excluded_keywords)
     _validate_marketplaces(config.marketplaces)
     _validate_positioning_mode(scope.positioning_mode)
@@ -116,71 +237,74 @@ def run_product_discovery(
             trend_traffic_estimate=0,
         )
 
-    _collect_search_expansions(
-        seed_keywords=seed_keywords,
-        config=config,
-        fetcher=resolved_fetcher,
-        search_expansions=search_expansions,
-        candidate_map=candidate_map,
-        warnings=warnings,
-    )
+    # One pool per run: suggestion lookups and marketplace scans are network-bound
+    # and independent, so they are issued concurrently and merged back in order.
+    with ThreadPoolExecutor(max_workers=config.max_parallel_fetches) as executor:
+        _collect_search_expansions(
+            seed_keywords=seed_keywords,
+            config=config,
+            fetcher=resolved_fetcher,
+            executor=executor,
+            search_expansions=search_expansions,
+            candidate_map=candidate_map,
+            warnings=warnings,
+        )
 
-    _collect_trend_signals(
-        seed_keywords=seed_keywords,
-        config=config,
-        fetcher=resolved_fetcher,
-        trend_signals=trend_signals,
-        candidate_map=candidate_map,
-        warnings=warnings,
-    )
+        _collect_trend_signals(
+            seed_index=seed_index,
+            config=config,
+            fetcher=resolved_fetcher,
+            trend_signals=trend_signals,
+            candidate_map=candidate_map,
+            warnings=warnings,
+        )
 
-    filtered_candidates = _filter_candidates(candidate_map, excluded_keywords=excluded_keywords)
-    _collect_sustained_trend_signals(
-        seed_keywords=seed_keywords,
-        filtered_candidates=filtered_candidates,
-        config=config,
-        fetcher=resolved_fetcher,
-        sustained_trend_signals=sustained_trend_signals,
-        warnings=warnings,
-    )
-    shortlisted_candidates = _shortlist_candidates(
-        filtered_candidates=filtered_candidates,
-        max_candidates=config.max_marketplace_terms,
-    )
+        filtered_candidates = _filter_candidates(candidate_map, excluded_keywords=excluded_keywords)
+        _collect_sustained_trend_signals(
+            seed_index=seed_index,
+            filtered_candidates=filtered_candidates,
+            config=config,
+            fetcher=resolved_fetcher,
+            executor=executor,
+            sustained_trend_signals=sustained_trend_signals,
+            warnings=warnings,
+        )
+        shortlisted_candidates = _shortlist_candidates(
+            filtered_candidates=filtered_candidates,
+            max_candidates=config.max_marketplace_terms,
+        )
 
-    opportunities: list[ProductOpportunity] = []
-    marketplace_unavailable: dict[str, str] = {}
-    for candidate in shortlisted_candidates:
-        snapshots = _scan_marketplaces_for_keyword(
-            keyword=candidate.keyword,
+        snapshots_by_keyword = _scan_marketplaces(
+            keywords=[candidate.keyword for candidate in shortlisted_candidates],
             marketplaces=config.marketplaces,
             max_sample_products=config.max_sample_products,
             target_pricing_store_id=config.target_pricing_store_id,
             fetcher=resolved_fetcher,
+            executor=executor,
             warnings=warnings,
-            marketplace_unavailable=marketplace_unavailable,
         )
-        marketplace_score = _score_marketplace_snapshots(snapshots)
-        search_score = min(COMPONENT_SCORE_CAP, candidate.search_points * SEARCH_RANK_MULTIPLIER)
-        trend_score = min(COMPONENT_SCORE_CAP, candidate.trend_points)
-        sustained_score = min(COMPONENT_SCORE_CAP, candidate.sustained_points)
-        quality_fit_score = _score_quality_fit(
-            keyword=candidate.keyword,
+
+    marketplace_scores = _score_all_marketplaces(snapshots_by_keyword)
+
+    component_scores = _score_components(shortlisted_candidates, marketplace_scores)
+
+    opportunities: list[ProductOpportunity] = []
+    for candidate, snapshots, scores in zip(
+        shortlisted_candidates, snapshots_by_keyword, component_scores
+    ):
+        search_score, trend_score, sustained_score, marketplace_score, total_score = scores
+        quality_fit_score = score_quality_fit(
+            keyword_lower=candidate.keyword_lower,
             positioning_mode=scope.positioning_mode,
         )
-        total_score = (
-            search_score * WEIGHTED_SCORE_WEIGHTS["search"]
-            + trend_score * WEIGHTED_SCORE_WEIGHTS["trend"]
-            + sustained_score * WEIGHTED_SCORE_WEIGHTS["sustained"]
-            + marketplace_score * WEIGHTED_SCORE_WEIGHTS["marketplace"]
-        )
-        recommendation = _inventory_recommendation(
+        recommendation = inventory_recommendation(
             total_score=total_score,
             sustained_score=sustained_score,
             marketplace_score=marketplace_score,
             quality_fit_score=quality_fit_score,
             positioning_mode=scope.positioning_mode,
         )
+        sources = _decode_sources(candidate.sources)
         opportunities.append(
             ProductOpportunity(
                 keyword=candidate.keyword,
@@ -191,9 +315,10 @@ def run_product_discovery(
                 marketplace_score=round(marketplace_score, 2),
                 quality_fit_score=round(quality_fit_score, 2),
                 inventory_recommendation=recommendation,
-                sources=sorted(candidate.sources),
+                sources=sources,
                 rationale=_build_rationale(
                     candidate=candidate,
+                    sources=sources,
                     snapshots=snapshots,
                     recommendation=recommendation,
                     quality_fit_score=quality_fit_score,
@@ -202,7 +327,13 @@ def run_product_discovery(
             )
         )
 
-    opportunities.sort(key=lambda item: (-item.score_total, item.keyword.lower()))
+    def rank_key(item: ProductOpportunity) -> tuple[float, str]:
+        return (-item.score_total, item.keyword.lower())
+
+    if config.max_opportunities_returned is None:
+        opportunities.sort(key=rank_key)
+    else:
+        opportunities = heapq.nsmallest(config.max_opportunities_returned, opportunities, key=rank_key)
 
     finished_at = now_utc_iso()
     report = ProductDiscoveryReport(
@@ -233,62 +364,67 @@ def _collect_search_expansions(
     seed_keywords: list[str],
     config: DiscoveryConfig,
     fetcher: Fetcher,
+    executor: Executor,
     search_expansions: list[SearchExpansion],
     candidate_map: dict[str, _CandidateAccumulator],
     warnings: list[str],
 ) -> None:
+    jobs: list[tuple[str, str, str, Future[list[str]]]] = []
     for seed_keyword in seed_keywords:
-        google_suggestions: list[str] = []
-        try:
-            google_suggestions = fetch_google_suggestions(
-                keyword=seed_keyword,
-                language=config.language,
-                max_items=config.max_suggestions_per_source,
-                fetcher=fetcher,
-            )
-        except Exception as exc:  # noqa: BLE001 - surfaced in warnings for ops visibility
-            warnings.append(f"Google Suggest failed for '{seed_keyword}': {exc}")
-        if google_suggestions:
-            search_expansions.append(
-                SearchExpansion(
-                    seed_keyword=seed_keyword,
-                    source="google_suggest",
-                    suggestions=google_suggestions,
-                )
+        jobs.append(
+            (
+                seed_keyword,
+                "google_suggest",
+                "Google Suggest",
+                executor.submit(
+                    fetch_google_suggestions,
+                    keyword=seed_keyword,
+                    language=config.language,
+                    max_items=config.max_suggestions_per_source,
+                    fetcher=fetcher,
+                ),
             )
-            _apply_ranked_suggestions(
-                candidate_map=candidate_map,
-                suggestions=google_suggestions,
-                source="google_suggest",
+        )
+        jobs.append(
+            (
+                seed_keyword,
+                "amazon_suggest",
+                "Amazon Suggest",
+                executor.submit(
+                    fetch_amazon_suggestions,
+                    keyword=seed_keyword,
+                    max_items=config.max_suggestions_per_source,
+                    fetcher=fetcher,
+                ),
             )
+        )
 
-        amazon_suggestions: list[str] = []
+    # Results are merged in submission order so the first-seen spelling of a
+    # keyword, and therefore the report, does not depend on response timing.
+    for seed_keyword, source, label, future in jobs:
+        suggestions: list[str] = []
         try:
-            amazon_suggestions = fetch_amazon_suggestions(
-                keyword=seed_keyword,
-                max_items=config.max_suggestions_per_source,
-                fetcher=fetcher,
-            )
+            suggestions = future.result()
         except Exception as exc:  # noqa: BLE001 - surfaced in warnings for ops visibility
-            warnings.append(f"Amazon Suggest failed for '{seed_keyword}': {exc}")
-        if amazon_suggestions:
+            warnings.append(f"{label} failed for '{seed_keyword}': {exc}")
+        if suggestions:
             search_expansions.append(
                 SearchExpansion(
                     seed_keyword=seed_keyword,
-                    source="amazon_suggest",
-                    suggestions=amazon_suggestions,
+                    source=source,
+                    suggestions=suggestions,
                 )
             )
             _apply_ranked_suggestions(
                 candidate_map=candidate_map,
-                suggestions=amazon_suggestions,
-                source="amazon_suggest",
+                suggestions=suggestions,
+                source=source,
             )
 
 
 def _collect_trend_signals(
     *,
-    seed_keywords: list[str],
+    seed_index: SeedIndex,
     config: DiscoveryConfig,
     fetcher: Fetcher,
     trend_signals: list[TrendSignal],
@@ -306,7 +442,8 @@ def _collect_trend_signals(
         return
 
     for record in trend_records:
-        relevance = _keyword_relevance(record.query, seed_keywords)
+        query_lower = record.query.lower()
+        relevance = keyword_relevance(query_lower, keyword_tokens(query_lower), seed_index)
         if relevance < MIN_RELEVANCE_FOR_TRENDS:
             continue
         trend_signals.append(
@@ -321,7 +458,7 @@ def _collect_trend_signals(
         )
         trend_points = (
             relevance * TREND_RELEVANCE_MULTIPLIER
-            + _log_scaled(record.approx_traffic_estimate) * TREND_TRAFFIC_MULTIPLIER
+            + log_scaled(record.approx_traffic_estimate) * TREND_TRAFFIC_MULTIPLIER
         )
         _add_candidate(
             candidate_map=candidate_map,
@@ -335,37 +472,55 @@ def _collect_trend_signals(
 
 def _collect_sustained_trend_signals(
     *,
-    seed_keywords: list[str],
+    seed_index: SeedIndex,
     filtered_candidates: list[_CandidateAccumulator],
     config: DiscoveryConfig,
     fetcher: Fetcher,
+    executor: Executor,
     sustained_trend_signals: list[SustainedTrendSignal],
     warnings: list[str],
 ) -> None:
-    ranked = sorted(
-        filtered_candidates,
-        key=lambda item: (-(item.search_points + item.trend_points), item.keyword.lower()),
-    )
-    selected: list[_CandidateAccumulator] = []
-    for candidate in ranked:
-        relevance = _keyword_relevance(candidate.keyword, seed_keywords)
+    # Pop in rank order until enough relevant terms are found; heapify is O(N)
+    # and usually only a few pops are needed, unlike sorting every candidate.
+    # key is unique per candidate, so tuples never compare the accumulators.
+    ranked = [
+        (-(item.search_points + item.trend_points), item.key, item)
+        for item in filtered_candidates
+    ]
+    heapq.heapify(ranked)
+    selected: list[tuple[_CandidateAccumulator, float]] = []
+    while ranked:
+        candidate = heapq.heappop(ranked)[2]
+        relevance = keyword_relevance(candidate.keyword_lower, candidate.tokens, seed_index)
         if relevance < MIN_RELEVANCE_FOR_SUSTAINED_TRENDS:
             continue
-        selected.append(candidate)
+        selected.append((candidate, relevance))
         if len(selected) >= config.max_sustained_trend_terms:
             break
 
+    # Fetch ahead through a small sliding window but consume results in rank
+    # order, so the failure cutoff stops at the same candidate as a serial loop.
+    window = min(MAX_PARALLEL_TIMESERIES_FETCHES, config.max_parallel_fetches)
+
+    def submit(index: int) -> Future[tuple[int, ...]]:
+        return executor.submit(
+            _fetch_trends_timeseries,
+            selected[index][0].keyword,
+            config.geo,
+            config.language,
+            config.trend_time_window,
+            fetcher,
+        )
+
+    in_flight = deque(submit(index) for index in range(min(window, len(selected))))
     failure_count = 0
-    for candidate in selected:
-        relevance = _keyword_relevance(candidate.keyword, seed_keywords)
+    fetched: list[tuple[_CandidateAccumulator, float, list[int]]] = []
+    for index, (candidate, relevance) in enumerate(selected):
+        future = in_flight.popleft()
+        if index + window < len(selected):
+            in_flight.append(submit(index + window))
         try:
-            values = fetch_google_trends_timeseries(
-                keyword=candidate.keyword,
-                geo=config.geo,
-                language=config.language,
-                time_window=config.trend_time_window,
-                fetcher=fetcher,
-            )
+            values = list(future.result())
         except Exception as exc:  # noqa: BLE001 - surfaced in warnings for ops visibility
             warnings.append(
                 f"Google Trends timeseries failed for '{candidate.keyword}': {exc}"
@@ -375,22 +530,26 @@ def _collect_sustained_trend_signals(
                 warnings.append(
                     "Google Trends timeseries disabled for remaining candidates after repeated failures."
                 )
+                for pending in in_flight:
+                    pending.cancel()
                 break
             continue
         if len(values) < SUSTAINED_TREND_MIN_POINTS:
             continue
+        fetched.append((candidate, relevance, values))
 
-        metrics = compute_sustained_trend_metrics(
-            values=values,
-            recent_points=SUSTAINED_TREND_RECENT_POINTS,
-            baseline_points=SUSTAINED_TREND_BASELINE_POINTS,
-        )
+    metrics_batch = compute_sustained_trend_metrics_batch(
+        series=[values for _, _, values in fetched],
+        recent_points=SUSTAINED_TREND_RECENT_POINTS,
+        baseline_points=SUSTAINED_TREND_BASELINE_POINTS,
+    )
+    for (candidate, relevance, _), metrics in zip(fetched, metrics_batch):
         if not metrics:
             continue
 
         candidate.sustained_points += metrics.sustained_score * relevance
         candidate.sustained_direction = metrics.direction
-        candidate.sources.add("google_trends_timeseries")
+        candidate.sources |= _SOURCE_BITS["google_trends_timeseries"]
         sustained_trend_signals.append(
             SustainedTrendSignal(
                 query=candidate.keyword,
@@ -409,6 +568,31 @@ def _collect_sustained_trend_signals(
         )
 
 
+def _fetch_trends_timeseries(
+    keyword: str,
+    geo: str,
+    language: str,
+    time_window: str,
+    fetcher: Fetcher,
+) -> tuple[int, ...]:
+    # The fetcher is deliberately not part of the key: each run builds a new one,
+    # and the series depends only on the query. Failures raise and are never cached.
+    key = (keyword, geo, language, time_window)
+    cached = _TIMESERIES_CACHE.get(key)
+    if cached is None:
+        cached = tuple(
+            fetch_google_trends_timeseries(
+                keyword=keyword,
+                geo=geo,
+                language=language,
+                time_window=time_window,
+                fetcher=fetcher,
+            )
+        )
+        _TIMESERIES_CACHE.put(key, cached)
+    return cached
+
+
 def _apply_ranked_suggestions(
     *,
     candidate_map: dict[str, _CandidateAccumulator],
@@ -435,12 +619,17 @@ def _filter_candidates(
     *,
     excluded_keywords: set[str],
 ) -> list[_CandidateAccumulator]:
+    excluded_token_sets = [tokens for tokens in map(keyword_tokens, excluded_keywords) if tokens]
+    excluded_automaton = _build_exclusion_automaton(excluded_keywords)
     filtered: list[_CandidateAccumulator] = []
     for accumulator in candidate_map.values():
-        normalized = _normalize_keyword(accumulator.keyword)
-        if not normalized:
-            continue
-        if _is_excluded(normalized, excluded_keywords):
+        if is_excluded(
+            accumulator.keyword_lower,
+            accumulator.tokens,
+            excluded_keywords,
+            excluded_token_sets=excluded_token_sets,
+            excluded_automaton=excluded_automaton,
+        ):
             continue
         filtered.append(accumulator)
     return filtered
@@ -451,62 +640,85 @@ def _shortlist_candidates(
     filtered_candidates: list[_CandidateAccumulator],
     max_candidates: int,
 ) -> list[_CandidateAccumulator]:
-    ranked = sorted(
+    return heapq.nsmallest(
+        max_candidates,
         filtered_candidates,
         key=lambda item: (
             -(item.search_points + item.trend_points + item.sustained_points),
-            item.keyword.lower(),
+            item.key,
         ),
     )
-    return ranked[:max_candidates]
 
 
-def _scan_marketplaces_for_keyword(
+def _scan_marketplaces(
     *,
-    keyword: str,
+    keywords: list[str],
     marketplaces: tuple[str, ...],
     max_sample_products: int,
     target_pricing_store_id: str,
     fetcher: Fetcher,
+    executor: Executor,
     warnings: list[str],
-    marketplace_unavailable: dict[str, str],
-) -> list[MarketplaceSnapshot]:
-    snapshots: list[MarketplaceSnapshot] = []
-    for marketplace in marketplaces:
-        if marketplace in marketplace_unavailable:
-            snapshots.append(
-                MarketplaceSnapshot(
-                    marketplace=marketplace,
-                    query=keyword,
-                    source_url="",
-                    status="skipped",
-                    total_results_estimate=None,
-                    sample_products=[],
-                    warning=marketplace_unavailable[marketplace],
-                )
-            )
-            continue
+) -> list[list[MarketplaceSnapshot]]:
+    # Lowest keyword index whose scan disabled each marketplace. Scans for later
+    # keywords check it before fetching, so a 429 stops pending requests early.
+    disabled_from: dict[str, int] = {}
+    disabled_lock = threading.Lock()
+
+    def scan(
+        index: int,
+        keyword: str,
+        marketplace: str,
+        adapter: Callable[..., MarketplaceScanResult],
+    ) -> MarketplaceScanResult | None:
+        with disabled_lock:
+            if disabled_from.get(marketplace, index) < index:
+                return None
         try:
-            if marketplace == "amazon":
-                result = scan_amazon_marketplace(
-                    keyword=keyword,
-                    max_sample_products=max_sample_products,
-                    fetcher=fetcher,
-                )
-            elif marketplace == "walmart":
-                result = scan_walmart_marketplace(
-                    keyword=keyword,
-                    max_sample_products=max_sample_products,
-                    fetcher=fetcher,
-                )
-            elif marketplace == "target":
-                result = scan_target_marketplace(
-                    keyword=keyword,
-                    max_sample_products=max_sample_products,
-                    pricing_store_id=target_pricing_store_id,
-                    fetcher=fetcher,
+            return adapter(
+                keyword=keyword,
+                max_sample_products=max_sample_products,
+                target_pricing_store_id=target_pricing_store_id,
+                fetcher=fetcher,
+            )
+        except Exception as exc:
+            if _should_disable_marketplace(str(exc)):
+                with disabled_lock:
+                    disabled_from[marketplace] = min(disabled_from.get(marketplace, index), index)
+            raise
+
+    adapters = [_MARKETPLACE_ADAPTERS.get(marketplace) for marketplace in marketplaces]
+    futures = [
+        [
+            executor.submit(scan, index, keyword, marketplace, adapter)
+            if adapter is not None
+            else None
+            for marketplace, adapter in zip(marketplaces, adapters)
+        ]
+        for index, keyword in enumerate(keywords)
+    ]
+
+    # Assemble in keyword order, replaying the serial disable logic so results
+    # that finished after an earlier keyword disabled their marketplace are dropped.
+    marketplace_unavailable: dict[str, str] = {}
+    snapshots_by_keyword: list[list[MarketplaceSnapshot]] = []
+    for keyword, keyword_futures in zip(keywords, futures):
+        snapshots: list[MarketplaceSnapshot] = []
+        for marketplace, future in zip(marketplaces, keyword_futures):
+            if marketplace in marketplace_unavailable:
+                snapshots.append(
+                    MarketplaceSnapshot(
+                        marketplace=marketplace,
+                        query=keyword,
+                        source_url="",
+                        status="skipped",
+                        total_results_estimate=None,
+                        sample_products=[],
+                        warning=marketplace_unavailable[marketplace],
+                    )
                 )
-            else:
+                continue
+            if future is None:
                 warnings.append(f"Marketplace adapter not implemented for '{marketplace}'.")
                 snapshots.append(
                     MarketplaceSnapshot(
@@ -520,6 +732,28 @@ def _scan_marketplaces_for_keyword(
                     )
                 )
                 continue
+            try:
+                result = future.result()
+            except Exception as exc:  # noqa: BLE001 - surfaced in warnings for ops visibility
+                warning = f"Marketplace scan failed for '{keyword}' on {marketplace}: {exc}"
+                warnings.append(warning)
+                if _should_disable_marketplace(str(exc)):
+                    marketplace_unavailable[marketplace] = str(exc)
+                    warnings.append(
+                        f"Marketplace '{marketplace}' disabled for remaining keywords due to repeated-structure failure."
+                    )
+                snapshots.append(
+                    MarketplaceSnapshot(
+                        marketplace=marketplace,
+                        query=keyword,
+                        source_url="",
+                        status="error",
+                        total_results_estimate=None,
+                        sample_products=[],
+                        warning=str(exc),
+                    )
+                )
+                continue
             snapshots.append(
                 MarketplaceSnapshot(
                     marketplace=marketplace,
@@ -531,26 +765,80 @@ def _scan_marketplaces_for_keyword(
                     warning=None,
                 )
             )
-        except Exception as exc:  # noqa: BLE001 - surfaced in warnings for ops visibility
-            warning = f"Marketplace scan failed for '{keyword}' on {marketplace}: {exc}"
-            warnings.append(warning)
-            if _should_disable_marketplace(str(exc)):
-                marketplace_unavailable[marketplace] = str(exc)
-                warnings.append(
-                    f"Marketplace '{marketplace}' disabled for remaining keywords due to repeated-structure failure."
-                )
-            snapshots.append(
-                MarketplaceSnapshot(
-                    marketplace=marketplace,
-                    query=keyword,
-                    source_url="",
-                    status="error",
-                    total_results_estimate=None,
-                    sample_products=[],
-                    warning=str(exc),
-                )
+        snapshots_by_keyword.append(snapshots)
+    return snapshots_by_keyword
+
+
+def _score_components(
+    candidates: list[_CandidateAccumulator],
+    marketplace_scores: list[float],
+) -> list[tuple[float, float, float, float, float]]:
+    if np is None or not candidates:
+        scores: list[tuple[float, float, float, float, float]] = []
+        for candidate, marketplace_score in zip(candidates, marketplace_scores):
+            search_score = min(COMPONENT_SCORE_CAP, candidate.search_points * SEARCH_RANK_MULTIPLIER)
+            trend_score = min(COMPONENT_SCORE_CAP, candidate.trend_points)
+            sustained_score = min(COMPONENT_SCORE_CAP, candidate.sustained_points)
+            total_score = (
+                search_score * WEIGHTED_SCORE_WEIGHTS["search"]
+                + trend_score * WEIGHTED_SCORE_WEIGHTS["trend"]
+                + sustained_score * WEIGHTED_SCORE_WEIGHTS["sustained"]
+                + marketplace_score * WEIGHTED_SCORE_WEIGHTS["marketplace"]
             )
-    return snapshots
+            scores.append((search_score, trend_score, sustained_score, marketplace_score, total_score))
+        return scores
+
+    columns = np.array(
+        [
+            (
+                candidate.search_points * SEARCH_RANK_MULTIPLIER,
+                candidate.trend_points,
+                candidate.sustained_points,
+                marketplace_score,
+            )
+            for candidate, marketplace_score in zip(candidates, marketplace_scores)
+        ],
+        dtype=np.float64,
+    )
+    capped = np.minimum(COMPONENT_SCORE_CAP, columns)
+    # Summed term by term in the scalar path's order, so totals match it exactly.
+    total = (
+        capped[:, 0] * WEIGHTED_SCORE_WEIGHTS["search"]
+        + capped[:, 1] * WEIGHTED_SCORE_WEIGHTS["trend"]
+        + capped[:, 2] * WEIGHTED_SCORE_WEIGHTS["sustained"]
+        + capped[:, 3] * WEIGHTED_SCORE_WEIGHTS["marketplace"]
+    )
+    return [tuple(row) for row in np.column_stack((capped, total)).tolist()]
+
+
+def _score_all_marketplaces(snapshots_by_keyword: list[list[MarketplaceSnapshot]]) -> list[float]:
+    if np is None:
+        return [_score_marketplace_snapshots(snapshots) for snapshots in snapshots_by_keyword]
+
+    rows = [
+        (index, snapshot.total_results_estimate or 0, len(snapshot.sample_products))
+        for index, snapshots in enumerate(snapshots_by_keyword)
+        for snapshot in snapshots
+        if snapshot.status == "ok"
+    ]
+    if not rows:
+        return [0.0] * len(snapshots_by_keyword)
+
+    # Same formula as _score_marketplace_snapshots; bincount sums each keyword's
+    # rows in order, including keywords without any "ok" snapshot.
+    candidate_index, totals, sample_counts = np.array(rows, dtype=np.float64).T
+    covered = totals > 0
+    capped = np.minimum(totals, MARKETPLACE_RESULT_CAP)
+    result_signals = np.where(covered, np.minimum(1.0, np.log10(capped + 1) / 6.0), 0.0)
+    group = candidate_index.astype(np.intp)
+    keyword_count = len(snapshots_by_keyword)
+    score = (
+        np.bincount(group, weights=covered, minlength=keyword_count) * MARKETPLACE_COVERAGE_WEIGHT
+        + np.bincount(group, weights=result_signals, minlength=keyword_count) * MARKETPLACE_RESULTS_WEIGHT
+        + np.bincount(group, weights=sample_counts, minlength=keyword_count)
+        * MARKETPLACE_SAMPLE_TITLES_WEIGHT
+    )
+    return np.minimum(COMPONENT_SCORE_CAP, score).tolist()
 
 
 def _score_marketplace_snapshots(snapshots: list[MarketplaceSnapshot]) -> float:
@@ -564,7 +852,7 @@ def _score_marketplace_snapshots(snapshots: list[MarketplaceSnapshot]) -> float:
         if snapshot.total_results_estimate and snapshot.total_results_estimate > 0:
             coverage_count += 1
             capped = min(snapshot.total_results_estimate, MARKETPLACE_RESULT_CAP)
-            result_signal += _log_scaled(capped)
+            result_signal += log_scaled(capped)
         sample_count += len(snapshot.sample_products)
 
     score = (
@@ -578,12 +866,13 @@ def _score_marketplace_snapshots(snapshots: list[MarketplaceSnapshot]) -> float:
 def _build_rationale(
     *,
     candidate: _CandidateAccumulator,
+    sources: list[str],
     snapshots: list[MarketplaceSnapshot],
     recommendation: str,
     quality_fit_score: float,
 ) -> list[str]:
     rationale: list[str] = []
-    source_text = ", ".join(sorted(candidate.sources))
+    source_text = ", ".join(sources)
     rationale.append(f"Signal sources: {source_text}.")
 
     if candidate.trend_hits > 0:
@@ -638,16 +927,22 @@ def _add_candidate(
     source: str,
     trend_traffic_estimate: int,
 ) -> None:
-    normalized = _normalize_keyword(keyword)
-    if not normalized:
+    normalized_and_key = normalize_and_key(keyword)
+    if normalized_and_key is None:
         return
-    key = normalized.lower()
-    if key not in candidate_map:
-        candidate_map[key] = _CandidateAccumulator(keyword=normalized)
-    candidate = candidate_map[key]
+    normalized, key = normalized_and_key
+    candidate = candidate_map.get(key)
+    if candidate is None:
+        keyword_lower = normalized.lower()
+        candidate = candidate_map[key] = _CandidateAccumulator(
+            keyword=normalized,
+            key=key,
+            keyword_lower=keyword_lower,
+            tokens=keyword_tokens(keyword_lower),
+        )
     candidate.search_points += search_points
     candidate.trend_points += trend_points
-    candidate.sources.add(source)
+    candidate.sources |= _SOURCE_BITS[source]
     if trend_points > 0:
         candidate.trend_hits += 1
         candidate.max_trend_traffic_estimate = max(
@@ -656,14 +951,18 @@ def _add_candidate(
         )
 
 
+def _decode_sources(mask: int) -> list[str]:
+    return [name for name in _SOURCE_NAMES if mask & _SOURCE_BITS[name]]
+
+
 def _normalize_seed_keywords(seed_keywords: list[str]) -> list[str]:
     deduped: list[str] = []
     seen: set[str] = set()
     for keyword in seed_keywords:
-        normalized = _normalize_keyword(keyword)
-        if not normalized:
+        normalized_and_key = normalize_and_key(keyword)
+        if normalized_and_key is None:
             continue
-        key = normalized.lower()
+        normalized, key = normalized_and_key
         if key in seen:
             continue
         seen.add(key)
@@ -674,128 +973,20 @@ def _normalize_seed_keywords(seed_keywords: list[str]) -> list[str]:
 def _normalize_exclusions(excluded_keywords: list[str]) -> set[str]:
     normalized: set[str] = set()
     for keyword in excluded_keywords:
-        value = _normalize_keyword(keyword).lower()
+        value = normalize_keyword(keyword).lower()
         if value:
             normalized.add(value)
     return normalized
 
 
-def _is_excluded(keyword: str, excluded_keywords: set[str]) -> bool:
-    if not excluded_keywords:
-        return False
-    lower_keyword = keyword.lower()
-    if lower_keyword in excluded_keywords:
-        return True
-    keyword_tokens = set(_TOKEN_RE.findall(lower_keyword))
+def _build_exclusion_automaton(excluded_keywords: set[str]):
+    if ahocorasick is None or not excluded_keywords:
+        return None
+    automaton = ahocorasick.Automaton()
     for excluded in excluded_keywords:
-        if excluded in lower_keyword:
-            return True
-        excluded_tokens = set(_TOKEN_RE.findall(excluded))
-        if excluded_tokens and excluded_tokens.issubset(keyword_tokens):
-            return True
-    return False
-
-
-def _keyword_relevance(candidate_keyword: str, seed_keywords: list[str]) -> float:
-    candidate_tokens = set(_TOKEN_RE.findall(candidate_keyword.lower()))
-    if not candidate_tokens:
-        return 0.0
-
-    best_score = 0.0
-    candidate_lower = candidate_keyword.lower()
-    for seed_keyword in seed_keywords:
-        seed_lower = seed_keyword.lower()
-        seed_tokens = set(_TOKEN_RE.findall(seed_lower))
-        if not seed_tokens:
-            continue
-
-        overlap = len(candidate_tokens.intersection(seed_tokens))
-        if overlap > 0:
-            token_ratio = overlap / len(seed_tokens)
-            best_score = max(best_score, token_ratio)
-        elif seed_lower in candidate_lower or candidate_lower in seed_lower:
-            best_score = max(best_score, 0.35)
-
-    return min(1.0, best_score)
-
-
-def _score_quality_fit(*, keyword: str, positioning_mode: str) -> float:
-    keyword_lower = keyword.lower()
-    score = QUALITY_SCORE_BASELINE
-    for positive_token in QUALITY_POSITIVE_TOKENS:
-        if positive_token in keyword_lower:
-            score += QUALITY_POSITIVE_TOKEN_BOOST
-    for negative_token in QUALITY_NEGATIVE_TOKENS:
-        if negative_token in keyword_lower:
-            score -= QUALITY_NEGATIVE_TOKEN_PENALTY
-
-    if positioning_mode == "quality":
-        # Require stronger curation standards for quality-focused stores.
-        for negative_token in QUALITY_NEGATIVE_TOKENS:
-            if negative_token in keyword_lower:
-                score -= QUALITY_NEGATIVE_TOKEN_PENALTY
-    return _clamp(score, lower=QUALITY_SCORE_MIN, upper=QUALITY_SCORE_MAX)
-
-
-def _inventory_recommendation(
-    *,
-    total_score: float,
-    sustained_score: float,
-    marketplace_score: float,
-    quality_fit_score: float,
-    positioning_mode: str,
-) -> str:
-    quality_required = positioning_mode == "quality"
-
-    add_now_quality_ok = (
-        quality_fit_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["add_now_quality_min"]
-    ) if quality_required else True
-    if (
-        total_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["add_now_total_min"]
-        and sustained_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["add_now_sustained_min"]
-        and marketplace_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["add_now_marketplace_min"]
-        and add_now_quality_ok
-    ):
-        return "add_now"
-
-    test_quality_ok = (
-        quality_fit_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["test_batch_quality_min"]
-    ) if quality_required else True
-    if (
-        total_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["test_batch_total_min"]
-        and sustained_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["test_batch_sustained_min"]
-        and test_quality_ok
-    ):
-        return "test_small_batch"
-
-    if total_score >= INVENTORY_RECOMMENDATION_THRESHOLDS["watchlist_total_min"]:
-        return "watchlist"
-    return "reject"
-
-
-def _normalize_keyword(keyword: str) -> str:
-    collapsed = _WHITESPACE_RE.sub(" ", keyword.strip())
-    if not collapsed:
-        return ""
-    if len(collapsed) < MIN_KEYWORD_LENGTH:
-        return ""
-    if len(collapsed) > MAX_KEYWORD_LENGTH:
-        return collapsed[:MAX_KEYWORD_LENGTH].rstrip()
-    return collapsed
-
-
-def _log_scaled(value: int) -> float:
-    if value <= 0:
-        return 0.0
-    return min(1.0, log10(value + 1) / 6.0)
-
-
-def _clamp(value: float, *, lower: float, upper: float) -> float:
-    if value < lower:
-        return lower
-    if value > upper:
-        return upper
-    return value
+        automaton.add_word(excluded, excluded)
+    automaton.make_automaton()
+    return automaton
 
 
 def _validate_marketplaces(marketplaces: tuple[str, ...]) -> None:
@@ -817,14 +1008,4 @@ def _validate_positioning_mode(positioning_mode: str) -> None:
 
 
 def _should_disable_marketplace(error_text: str) -> bool:
-    normalized = error_text.lower()
-    disable_markers = (
-        "missing __next_data__ script",
-        "missing api key",
-        "http error 403",
-        "http error 429",
-        "precondition failed",
-        "access denied",
-        "pardon our interruption",
-    )
-    return any(marker in normalized for marker in disable_markers)
+    return _DISABLE_MARKETPLACE_RE.search(error_text.lower()) is not None
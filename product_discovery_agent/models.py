@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any
 
@@ -11,6 +11,7 @@ from .constants import (
     DEFAULT_LANGUAGE,
     DEFAULT_MARKETPLACES,
     DEFAULT_MAX_MARKETPLACE_TERMS,
+    DEFAULT_MAX_PARALLEL_FETCHES,
     DEFAULT_MAX_SAMPLE_PRODUCTS,
     DEFAULT_MAX_SUSTAINED_TREND_TERMS,
     DEFAULT_MAX_SUGGESTIONS_PER_SOURCE,
@@ -34,7 +35,15 @@ class StoreScope:
     excluded_keywords: list[str] = field(default_factory=list)
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "store_name": self.store_name,
+            "seed_keywords": list(self.seed_keywords),
+            "tenant_id": self.tenant_id,
+            "account_id": self.account_id,
+            "shop_id": self.shop_id,
+            "positioning_mode": self.positioning_mode,
+            "excluded_keywords": list(self.excluded_keywords),
+        }
 
 
 @dataclass(slots=True)
@@ -47,13 +56,31 @@ class DiscoveryConfig:
     max_sustained_trend_terms: int = DEFAULT_MAX_SUSTAINED_TREND_TERMS
     max_marketplace_terms: int = DEFAULT_MAX_MARKETPLACE_TERMS
     max_sample_products: int = DEFAULT_MAX_SAMPLE_PRODUCTS
+    max_parallel_fetches: int = DEFAULT_MAX_PARALLEL_FETCHES
+    # None keeps every ranked opportunity; otherwise only the top N are returned.
+    max_opportunities_returned: int | None = None
     trend_time_window: str = DEFAULT_TREND_TIME_WINDOW
     target_pricing_store_id: str = DEFAULT_TARGET_PRICING_STORE_ID
     timeout_seconds: int = DEFAULT_REQUEST_TIMEOUT_SECONDS
     user_agent: str = DEFAULT_USER_AGENT
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "geo": self.geo,
+            "language": self.language,
+            "marketplaces": self.marketplaces,
+            "max_suggestions_per_source": self.max_suggestions_per_source,
+            "max_trend_items": self.max_trend_items,
+            "max_sustained_trend_terms": self.max_sustained_trend_terms,
+            "max_marketplace_terms": self.max_marketplace_terms,
+            "max_sample_products": self.max_sample_products,
+            "max_parallel_fetches": self.max_parallel_fetches,
+            "max_opportunities_returned": self.max_opportunities_returned,
+            "trend_time_window": self.trend_time_window,
+            "target_pricing_store_id": self.target_pricing_store_id,
+            "timeout_seconds": self.timeout_seconds,
+            "user_agent": self.user_agent,
+        }
 
 
 @dataclass(slots=True)
@@ -63,7 +90,11 @@ class SearchExpansion:
     suggestions: list[str]
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "seed_keyword": self.seed_keyword,
+            "source": self.source,
+            "suggestions": list(self.suggestions),
+        }
 
 
 @dataclass(slots=True)
@@ -76,7 +107,14 @@ class TrendSignal:
     relevance_score: float
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "query": self.query,
+            "source": self.source,
+            "rank": self.rank,
+            "approx_traffic": self.approx_traffic,
+            "approx_traffic_estimate": self.approx_traffic_estimate,
+            "relevance_score": self.relevance_score,
+        }
 
 
 @dataclass(slots=True)
@@ -95,7 +133,20 @@ class SustainedTrendSignal:
     store_relevance: float
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "query": self.query,
+            "source": self.source,
+            "time_window": self.time_window,
+            "points_count": self.points_count,
+            "recent_average": self.recent_average,
+            "baseline_average": self.baseline_average,
+            "growth_rate": self.growth_rate,
+            "slope_per_point": self.slope_per_point,
+            "consistency_ratio": self.consistency_ratio,
+            "sustained_score": self.sustained_score,
+            "direction": self.direction,
+            "store_relevance": self.store_relevance,
+        }
 
 
 @dataclass(slots=True)
@@ -109,7 +160,15 @@ class MarketplaceSnapshot:
     warning: str | None = None
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "marketplace": self.marketplace,
+            "query": self.query,
+            "source_url": self.source_url,
+            "status": self.status,
+            "total_results_estimate": self.total_results_estimate,
+            "sample_products": list(self.sample_products),
+            "warning": self.warning,
+        }
 
 
 @dataclass(slots=True)
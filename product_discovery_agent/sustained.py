@@ -46,8 +46,25 @@ def compute_sustained_trend_metrics(
         SUSTAINED_BASELINE_DENOMINATOR_FLOOR,
         baseline_average,
     )
-    slope_per_point = _linear_slope(values)
-    consistency_ratio = _consistency_ratio(values)
+    return build_sustained_trend_metrics(
+        points_count=len(values),
+        recent_average=recent_average,
+        baseline_average=baseline_average,
+        growth_rate=growth_rate,
+        slope_per_point=_linear_slope(values),
+        consistency_ratio=_consistency_ratio(values),
+    )
+
+
+def build_sustained_trend_metrics(
+    *,
+    points_count: int,
+    recent_average: float,
+    baseline_average: float,
+    growth_rate: float,
+    slope_per_point: float,
+    consistency_ratio: float,
+) -> SustainedTrendMetrics:
     sustained_score = _score_sustained_metrics(
         growth_rate=growth_rate,
         slope_per_point=slope_per_point,
@@ -59,7 +76,7 @@ def compute_sustained_trend_metrics(
         consistency_ratio=consistency_ratio,
     )
     return SustainedTrendMetrics(
-        points_count=len(values),
+        points_count=points_count,
         recent_average=recent_average,
         baseline_average=baseline_average,
         growth_rate=growth_rate,
@@ -0,0 +1,114 @@
+"""Batch sustained trend scoring with an optional Numba kernel."""
+
+from __future__ import annotations
+
+from .constants import SUSTAINED_BASELINE_DENOMINATOR_FLOOR
+from .sustained import (
+    SustainedTrendMetrics,
+    build_sustained_trend_metrics,
+    compute_sustained_trend_metrics,
+)
+
+try:
+    # Optional: computes every candidate's series statistics in one native call.
+    import numba
+    import numpy as np
+except ImportError:
+    numba = None
+
+_METRIC_COLUMNS = 6
+
+if numba is not None:
+
+    @numba.njit(cache=True)
+    def _metrics_kernel(values, recent_points, baseline_points, out):
+        # Mirrors compute_sustained_trend_metrics operation for operation (no
+        # fastmath), so both paths round to the same report values.
+        count = values.shape[0]
+        out[5] = 0.0
+        if recent_points <= 0 or baseline_points <= 0 or count < recent_points + baseline_points:
+            return
+
+        recent_total = 0.0
+        for index in range(count - recent_points, count):
+            recent_total += values[index]
+        baseline_total = 0.0
+        for index in range(count - recent_points - baseline_points, count - recent_points):
+            baseline_total += values[index]
+        recent_average = recent_total / recent_points
+        baseline_average = baseline_total / baseline_points
+
+        total = 0.0
+        for index in range(count):
+            total += values[index]
+        y_mean = total / count
+        x_mean = (count - 1) / 2.0
+        numerator = 0.0
+        denominator = 0.0
+        non_decreasing_steps = 0
+        for index in range(count):
+            x_delta = index - x_mean
+            numerator += x_delta * (values[index] - y_mean)
+            denominator += x_delta * x_delta
+            if index > 0 and values[index] >= values[index - 1]:
+                non_decreasing_steps += 1
+
+        out[0] = recent_average
+        out[1] = baseline_average
+        out[2] = (recent_average - baseline_average) / max(
+            SUSTAINED_BASELINE_DENOMINATOR_FLOOR,
+            baseline_average,
+        )
+        out[3] = numerator / denominator if denominator > 0 else 0.0
+        out[4] = non_decreasing_steps / (count - 1)
+        out[5] = count
+
+    @numba.njit(parallel=True, cache=True)
+    def _metrics_batch(padded, lengths, recent_points, baseline_points):
+        metrics = np.empty((padded.shape[0], _METRIC_COLUMNS))
+        for row in numba.prange(padded.shape[0]):
+            _metrics_kernel(padded[row, : lengths[row]], recent_points, baseline_points, metrics[row])
+        return metrics
+
+else:
+    _metrics_batch = None
+
+
+def compute_sustained_trend_metrics_batch(
+    *,
+    series: list[list[int]],
+    recent_points: int,
+    baseline_points: int,
+) -> list[SustainedTrendMetrics | None]:
+    if _metrics_batch is None or not series:
+        return [
+            compute_sustained_trend_metrics(
+                values=values,
+                recent_points=recent_points,
+                baseline_points=baseline_points,
+            )
+            for values in series
+        ]
+
+    lengths = np.array([len(values) for values in series], dtype=np.int64)
+    padded = np.zeros((len(series), int(lengths.max())), dtype=np.float64)
+    for row, values in enumerate(series):
+        padded[row, : len(values)] = values
+    metrics = _metrics_batch(padded, lengths, recent_points, baseline_points)
+
+    results: list[SustainedTrendMetrics | None] = []
+    for row in metrics:
+        if row[5] == 0.0:
+            results.append(None)
+            continue
+        results.append(
+            build_sustained_trend_metrics(
+                points_count=int(row[5]),
+                recent_average=float(row[0]),
+                baseline_average=float(row[1]),
+                growth_rate=float(row[2]),
+                slope_per_point=float(row[3]),
+                consistency_ratio=float(row[4]),
+            )
+        )
+    return results
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import pytest
+
+from product_discovery_agent import engine
+
+
+@pytest.fixture(autouse=True)
+def _isolate_timeseries_cache():
+    # The cache is process-wide; tests swap fetch functions, so never share entries.
+    engine._TIMESERIES_CACHE.clear()
+    yield
+    engine._TIMESERIES_CACHE.clear()
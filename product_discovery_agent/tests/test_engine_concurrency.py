@@ -0,0 +1,170 @@
+"""The pooled fetches must produce the same report as running every fetch in order."""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor, Future
+import time
+import zlib
+
+import pytest
+
+from product_discovery_agent import engine
+from product_discovery_agent.models import DiscoveryConfig, StoreScope
+from product_discovery_agent.sources import MarketplaceScanResult, TrendRecord
+
+SEEDS = ["dog bed", "cat tree", "broken leash"]
+GOOGLE_MODIFIERS = ("washable", "orthopedic", "large", "fleece", "premium", "calming")
+AMAZON_MODIFIERS = ("best", "cheap", "modern", "washable")
+
+
+class _InlineExecutor(Executor):
+    """Runs each job at submit time, which is exactly the old serial loop order."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:  # noqa: BLE001 - delivered through the future
+            future.set_exception(exc)
+        return future
+
+
+def _jitter(salt: str, *parts: str) -> None:
+    # Deterministic but uneven delays so later submissions often finish first.
+    time.sleep((zlib.crc32("|".join((salt, *parts)).encode()) % 7) / 1000.0)
+
+
+def _install_fake_sources(monkeypatch: pytest.MonkeyPatch, *, salt: str | None) -> None:
+    def delay(*parts: str) -> None:
+        if salt is not None:
+            _jitter(salt, *parts)
+
+    def google_suggestions(*, keyword, language, max_items, fetcher):
+        delay("google", keyword)
+        if "broken" in keyword:
+            raise RuntimeError("HTTP Error 500")
+        return [f"{keyword} {modifier}" for modifier in GOOGLE_MODIFIERS][:max_items]
+
+    def amazon_suggestions(*, keyword, max_items, fetcher):
+        delay("amazon", keyword)
+        if keyword == "cat tree":
+            raise RuntimeError("timed out")
+        return [f"{modifier} {keyword}" for modifier in AMAZON_MODIFIERS][:max_items]
+
+    def trends_rss(*, geo, max_items, fetcher):
+        return [
+            TrendRecord(query="dog bed sale", rank=1, approx_traffic="10K+", approx_traffic_estimate=10000),
+            TrendRecord(query="celebrity news", rank=2, approx_traffic="1M+", approx_traffic_estimate=1000000),
+        ]
+
+    def trends_timeseries(*, keyword, geo, language, time_window, fetcher):
+        delay("timeseries", keyword)
+        if "orthopedic" in keyword or "fleece" in keyword:
+            raise RuntimeError("HTTP Error 429")
+        if "large" in keyword:
+            return [50] * 8
+        checksum = zlib.crc32(keyword.encode())
+        return [(checksum >> (index % 24)) % 100 + index for index in range(24)]
+
+    def marketplace_scanner(name: str):
+        def scan(*, keyword, max_sample_products, fetcher, pricing_store_id=None):
+            delay(name, keyword)
+            if name == "amazon" and "washable" in keyword:
+                raise RuntimeError("HTTP Error 429: Too Many Requests")
+            if name == "walmart" and "premium" in keyword:
+                raise RuntimeError("random glitch")
+            total = None if "modern" in keyword else zlib.crc32(keyword.encode()) % 5000
+            return MarketplaceScanResult(
+                source_url=f"https://{name}.example/{keyword}",
+                total_results_estimate=total,
+                sample_products=[f"{keyword} item {index}" for index in range(max_sample_products)],
+            )
+
+        return scan
+
+    monkeypatch.setattr(engine, "fetch_google_suggestions", google_suggestions)
+    monkeypatch.setattr(engine, "fetch_amazon_suggestions", amazon_suggestions)
+    monkeypatch.setattr(engine, "fetch_google_trends_rss", trends_rss)
+    monkeypatch.setattr(engine, "fetch_google_trends_timeseries", trends_timeseries)
+    monkeypatch.setattr(engine, "scan_amazon_marketplace", marketplace_scanner("amazon"))
+    monkeypatch.setattr(engine, "scan_walmart_marketplace", marketplace_scanner("walmart"))
+    monkeypatch.setattr(engine, "scan_target_marketplace", marketplace_scanner("target"))
+
+
+def _run() -> dict:
+    engine._TIMESERIES_CACHE.clear()
+    report = engine.run_product_discovery(
+        scope=StoreScope(store_name="Shop", seed_keywords=list(SEEDS)),
+        config=DiscoveryConfig(
+            max_sustained_trend_terms=12,
+            max_marketplace_terms=20,
+            max_sample_products=2,
+            max_parallel_fetches=8,
+        ),
+        fetcher=lambda url, headers=None: "",
+    )
+    payload = report.to_dict()
+    for key in ("generated_at", "started_at", "finished_at"):
+        payload.pop(key)
+    return payload
+
+
+@pytest.fixture
+def serial_report(monkeypatch: pytest.MonkeyPatch) -> dict:
+    with monkeypatch.context() as patch:
+        _install_fake_sources(patch, salt=None)
+        patch.setattr(engine, "ThreadPoolExecutor", lambda max_workers: _InlineExecutor())
+        return _run()
+
+
+@pytest.mark.parametrize("salt", ["a", "b", "c"])
+def test_pooled_run_matches_serial_run(monkeypatch, serial_report, salt):
+    _install_fake_sources(monkeypatch, salt=salt)
+    assert _run() == serial_report
+
+
+def test_suggestion_results_merge_in_submission_order(serial_report):
+    assert [
+        (item["seed_keyword"], item["source"]) for item in serial_report["search_expansions"]
+    ] == [
+        ("dog bed", "google_suggest"),
+        ("dog bed", "amazon_suggest"),
+        ("cat tree", "google_suggest"),
+        ("broken leash", "amazon_suggest"),
+    ]
+    assert serial_report["warnings"][:2] == [
+        "Amazon Suggest failed for 'cat tree': timed out",
+        "Google Suggest failed for 'broken leash': HTTP Error 500",
+    ]
+
+
+def test_rate_limit_disables_marketplace_for_later_keywords(serial_report):
+    warnings = serial_report["warnings"]
+    disabled = "Marketplace 'amazon' disabled for remaining keywords due to repeated-structure failure."
+    assert warnings.count(disabled) == 1
+    failed = [warning for warning in warnings if warning.endswith("on amazon: HTTP Error 429: Too Many Requests")]
+    assert len(failed) == 1
+    assert warnings.index(disabled) == warnings.index(failed[0]) + 1
+
+    amazon = [
+        snapshot
+        for opportunity in serial_report["opportunities"]
+        for snapshot in opportunity["marketplace_snapshots"]
+        if snapshot["marketplace"] == "amazon"
+    ]
+    statuses = [snapshot["status"] for snapshot in amazon]
+    assert statuses.count("error") == 1
+    # More than one washable keyword is shortlisted, so later ones must be skipped.
+    assert statuses.count("skipped") >= 1
+    for snapshot in amazon:
+        if snapshot["status"] == "skipped":
+            assert snapshot["warning"] == "HTTP Error 429: Too Many Requests"
+
+
+def test_timeseries_failure_cutoff(serial_report):
+    warnings = serial_report["warnings"]
+    failures = [warning for warning in warnings if warning.startswith("Google Trends timeseries failed")]
+    assert len(failures) == engine.MAX_SUSTAINED_TREND_FETCH_FAILURES
+    cutoff = "Google Trends timeseries disabled for remaining candidates after repeated failures."
+    assert warnings.index(cutoff) == warnings.index(failures[-1]) + 1
+    assert serial_report["sustained_trend_signals"]
@@ -0,0 +1,77 @@
+"""The Aho-Corasick and substring exclusion paths must agree."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from product_discovery_agent import engine
+from product_discovery_agent._fastpath import is_excluded, keyword_tokens
+
+EXCLUDED = ["Cheap", "knockoff toy", "  dog   bed ", "pet-safe", "Sofa"]
+CASES = [
+    ("premium dog bed", True),
+    ("dog beds", True),
+    ("bed for dog", True),
+    ("cheapest collar", True),
+    ("toy knockoff", True),
+    ("knockoff", False),
+    ("pet-safe cleaner", True),
+    ("safe pet cleaner", True),
+    ("sofa cover", True),
+    ("sofas", True),
+    ("so fa", False),
+    ("", False),
+    ("quilt", False),
+]
+
+
+@pytest.fixture(params=["substring", "automaton"])
+def exclusion_matcher(request):
+    if request.param == "automaton":
+        pytest.importorskip("ahocorasick")
+        assert engine._build_exclusion_automaton({"probe"}) is not None
+    elif engine.ahocorasick is not None:
+        # Force the substring fallback even when the extension is installed.
+        request.getfixturevalue("monkeypatch").setattr(engine, "ahocorasick", None)
+
+    def matcher(keyword: str, excluded: list[str]) -> bool:
+        excluded_keywords = engine._normalize_exclusions(excluded)
+        lower_keyword = keyword.lower()
+        return is_excluded(
+            lower_keyword,
+            keyword_tokens(lower_keyword),
+            excluded_keywords,
+            excluded_token_sets=[
+                tokens for tokens in map(keyword_tokens, excluded_keywords) if tokens
+            ],
+            excluded_automaton=engine._build_exclusion_automaton(excluded_keywords),
+        )
+
+    return matcher
+
+
+@pytest.mark.parametrize(("keyword", "expected"), CASES)
+def test_is_excluded(exclusion_matcher, keyword, expected):
+    assert exclusion_matcher(keyword, EXCLUDED) is expected
+
+
+def test_is_excluded_without_exclusions(exclusion_matcher):
+    assert exclusion_matcher("dog bed", []) is False
+
+
+def test_is_excluded_matches_substring_semantics(exclusion_matcher):
+    rng = random.Random(7)
+    alphabet = "ab c"
+    for _ in range(500):
+        excluded = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(3)]
+        keyword = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+        excluded_keywords = engine._normalize_exclusions(excluded)
+        lower_keyword = keyword.lower()
+        expected = any(item in lower_keyword for item in excluded_keywords) or any(
+            tokens <= keyword_tokens(lower_keyword)
+            for tokens in map(keyword_tokens, excluded_keywords)
+            if tokens
+        )
+        assert exclusion_matcher(keyword, excluded) is expected, (keyword, excluded)
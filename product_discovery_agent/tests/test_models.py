@@ -0,0 +1,117 @@
+"""Hand-written to_dict methods must stay in step with the dataclass fields."""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+
+import pytest
+
+from product_discovery_agent.models import (
+    DiscoveryConfig,
+    MarketplaceSnapshot,
+    ProductDiscoveryReport,
+    ProductOpportunity,
+    SearchExpansion,
+    StoreScope,
+    SustainedTrendSignal,
+    TrendSignal,
+)
+
+
+def _snapshot(marketplace: str) -> MarketplaceSnapshot:
+    return MarketplaceSnapshot(
+        marketplace=marketplace,
+        query="dog bed",
+        source_url=f"https://{marketplace}.example/dog-bed",
+        status="ok",
+        total_results_estimate=1200,
+        sample_products=["Dog Bed Large", "Dog Bed Small"],
+        warning=None,
+    )
+
+
+def _opportunity(keyword: str) -> ProductOpportunity:
+    return ProductOpportunity(
+        keyword=keyword,
+        score_total=61.5,
+        search_score=40.0,
+        trend_score=12.25,
+        sustained_trend_score=55.0,
+        marketplace_score=70.0,
+        quality_fit_score=1.0,
+        inventory_recommendation="test_small_batch",
+        sources=["amazon_suggest", "seed_keyword"],
+        rationale=["Seed keyword.", "Marketplace coverage on 2 site(s)."],
+        marketplace_snapshots=[_snapshot("amazon"), _snapshot("walmart")],
+    )
+
+
+SCOPE = StoreScope(
+    store_name="Shop",
+    seed_keywords=["dog bed", "cat tree"],
+    tenant_id="tenant-1",
+    excluded_keywords=["cheap"],
+)
+CONFIG = DiscoveryConfig(max_opportunities_returned=5)
+EXPANSION = SearchExpansion(
+    seed_keyword="dog bed",
+    source="google_suggest",
+    suggestions=["dog bed washable", "dog bed large"],
+)
+TREND = TrendSignal(
+    query="dog bed sale",
+    source="google_trends_rss",
+    rank=1,
+    approx_traffic="10K+",
+    approx_traffic_estimate=10000,
+    relevance_score=0.5,
+)
+SUSTAINED = SustainedTrendSignal(
+    query="dog bed",
+    source="google_trends_timeseries",
+    time_window="today 12-m",
+    points_count=52,
+    recent_average=61.5,
+    baseline_average=40.0,
+    growth_rate=0.3583,
+    slope_per_point=0.41,
+    consistency_ratio=0.6,
+    sustained_score=72.5,
+    direction="steady_up",
+    store_relevance=1.0,
+)
+REPORT = ProductDiscoveryReport(
+    generated_at="2026-01-01T00:00:00+00:00",
+    started_at="2026-01-01T00:00:00+00:00",
+    finished_at="2026-01-01T00:00:05+00:00",
+    profile=SCOPE,
+    config=CONFIG,
+    opportunities=[_opportunity("dog bed"), _opportunity("cat tree")],
+    search_expansions=[EXPANSION],
+    trend_signals=[TREND],
+    sustained_trend_signals=[SUSTAINED],
+    warnings=["Amazon Suggest failed for 'cat tree': timed out"],
+)
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        SCOPE,
+        CONFIG,
+        EXPANSION,
+        TREND,
+        SUSTAINED,
+        _snapshot("target"),
+        _opportunity("dog bed"),
+        REPORT,
+    ],
+    ids=lambda model: type(model).__name__,
+)
+def test_to_dict_matches_asdict(model):
+    payload = model.to_dict()
+    expected = dataclasses.asdict(model)
+    assert payload == expected
+    # dict equality ignores key order, but the JSON report must keep field order.
+    assert json.dumps(payload) == json.dumps(expected)
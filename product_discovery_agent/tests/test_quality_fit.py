@@ -0,0 +1,78 @@
+"""score_quality_fit must keep the original per-token substring semantics."""
+
+from __future__ import annotations
+
+import itertools
+import random
+
+import pytest
+
+from product_discovery_agent._fastpath import clamp, score_quality_fit
+from product_discovery_agent.constants import (
+    QUALITY_NEGATIVE_TOKEN_PENALTY,
+    QUALITY_NEGATIVE_TOKENS,
+    QUALITY_POSITIVE_TOKEN_BOOST,
+    QUALITY_POSITIVE_TOKENS,
+    QUALITY_SCORE_BASELINE,
+    QUALITY_SCORE_MAX,
+    QUALITY_SCORE_MIN,
+)
+
+ALL_TOKENS = sorted(QUALITY_POSITIVE_TOKENS | QUALITY_NEGATIVE_TOKENS)
+
+
+def _baseline_score(keyword_lower: str, positioning_mode: str) -> float:
+    # The original implementation: one independent substring check per token.
+    score = QUALITY_SCORE_BASELINE
+    for positive_token in QUALITY_POSITIVE_TOKENS:
+        if positive_token in keyword_lower:
+            score += QUALITY_POSITIVE_TOKEN_BOOST
+    for negative_token in QUALITY_NEGATIVE_TOKENS:
+        if negative_token in keyword_lower:
+            score -= QUALITY_NEGATIVE_TOKEN_PENALTY
+    if positioning_mode == "quality":
+        for negative_token in QUALITY_NEGATIVE_TOKENS:
+            if negative_token in keyword_lower:
+                score -= QUALITY_NEGATIVE_TOKEN_PENALTY
+    return clamp(score, lower=QUALITY_SCORE_MIN, upper=QUALITY_SCORE_MAX)
+
+
+def _overlapping_keywords() -> list[str]:
+    keywords = list(ALL_TOKENS)
+    for first, second in itertools.product(ALL_TOKENS, repeat=2):
+        keywords.append(f"{first} {second}")
+        keywords.append(first + second)
+        # Share the longest suffix/prefix overlap, e.g. "officialuxury".
+        for size in range(min(len(first), len(second)) - 1, 0, -1):
+            if first.endswith(second[:size]):
+                keywords.append(first + second[size:])
+                break
+    return keywords
+
+
+def test_tokens_are_not_prefixes_of_each_other():
+    # The lookahead alternation finds one token per start position.
+    for first, second in itertools.permutations(ALL_TOKENS, 2):
+        assert not second.startswith(first), (first, second)
+
+
+@pytest.mark.parametrize("positioning_mode", ["balanced", "quality"])
+def test_matches_baseline_on_overlapping_tokens(positioning_mode):
+    keywords = _overlapping_keywords()
+    assert "officialuxury" in keywords
+    for keyword in keywords:
+        assert score_quality_fit(keyword_lower=keyword, positioning_mode=positioning_mode) == (
+            _baseline_score(keyword, positioning_mode)
+        ), keyword
+
+
+@pytest.mark.parametrize("positioning_mode", ["balanced", "quality"])
+def test_matches_baseline_on_random_keywords(positioning_mode):
+    rng = random.Random(3)
+    fillers = ["dog", "bed", "x", "", " "]
+    for _ in range(2000):
+        parts = rng.choices(ALL_TOKENS + fillers, k=rng.randint(0, 6))
+        keyword = rng.choice(("", " ")).join(parts)
+        assert score_quality_fit(keyword_lower=keyword, positioning_mode=positioning_mode) == (
+            _baseline_score(keyword, positioning_mode)
+        ), keyword
@@ -0,0 +1,104 @@
+"""The NumPy scoring paths must match their pure-Python fallbacks exactly."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from product_discovery_agent import engine
+from product_discovery_agent.models import MarketplaceSnapshot
+
+pytestmark = pytest.mark.skipif(engine.np is None, reason="numpy is not installed")
+
+
+def _without_numpy(monkeypatch: pytest.MonkeyPatch, function, *args):
+    with monkeypatch.context() as patch:
+        patch.setattr(engine, "np", None)
+        return function(*args)
+
+
+def _snapshot(status: str, total: int | None, samples: int) -> MarketplaceSnapshot:
+    return MarketplaceSnapshot(
+        marketplace="amazon",
+        query="dog bed",
+        source_url="",
+        status=status,
+        total_results_estimate=total,
+        sample_products=[f"item {index}" for index in range(samples)],
+    )
+
+
+def _random_snapshots_by_keyword(rng: random.Random) -> list[list[MarketplaceSnapshot]]:
+    return [
+        [
+            _snapshot(
+                rng.choice(("ok", "ok", "error", "skipped")),
+                rng.choice((None, 0, 1, 9, rng.randint(1, 10**7), engine.MARKETPLACE_RESULT_CAP)),
+                rng.randint(0, 6),
+            )
+            for _ in range(rng.randint(0, 3))
+        ]
+        for _ in range(rng.randint(0, 25))
+    ]
+
+
+@pytest.mark.parametrize(
+    "snapshots_by_keyword",
+    [
+        [],
+        [[]],
+        [[_snapshot("error", None, 0)], [_snapshot("skipped", None, 0)]],
+        [[_snapshot("ok", None, 3)], [_snapshot("ok", 0, 0)], [_snapshot("ok", 250, 2)]],
+        [[], [_snapshot("ok", 10**9, 40)], [_snapshot("error", 5, 1), _snapshot("ok", 0, 1)]],
+    ],
+)
+def test_score_all_marketplaces_matches_fallback(monkeypatch, snapshots_by_keyword):
+    expected = _without_numpy(monkeypatch, engine._score_all_marketplaces, snapshots_by_keyword)
+    assert engine._score_all_marketplaces(snapshots_by_keyword) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_score_all_marketplaces_matches_fallback_on_random_input(monkeypatch, seed):
+    snapshots_by_keyword = _random_snapshots_by_keyword(random.Random(seed))
+    expected = _without_numpy(monkeypatch, engine._score_all_marketplaces, snapshots_by_keyword)
+    assert engine._score_all_marketplaces(snapshots_by_keyword) == expected
+
+
+def _candidate(search: float, trend: float, sustained: float) -> engine._CandidateAccumulator:
+    return engine._CandidateAccumulator(
+        keyword="dog bed",
+        key="dog bed",
+        keyword_lower="dog bed",
+        tokens=frozenset({"dog", "bed"}),
+        search_points=search,
+        trend_points=trend,
+        sustained_points=sustained,
+    )
+
+
+@pytest.mark.parametrize(
+    ("candidates", "marketplace_scores"),
+    [
+        ([], []),
+        ([_candidate(0.0, 0.0, 0.0)], [0.0]),
+        ([_candidate(1e6, 1e6, 1e6)], [100.0]),
+        ([_candidate(3.7, 41.25, 0.0), _candidate(0.1, 0.0, 99.99)], [17.5, 0.0]),
+    ],
+)
+def test_score_components_matches_fallback(monkeypatch, candidates, marketplace_scores):
+    expected = _without_numpy(monkeypatch, engine._score_components, candidates, marketplace_scores)
+    assert engine._score_components(candidates, marketplace_scores) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_score_components_matches_fallback_on_random_input(monkeypatch, seed):
+    rng = random.Random(seed)
+    snapshots_by_keyword = _random_snapshots_by_keyword(rng)
+    marketplace_scores = engine._score_all_marketplaces(snapshots_by_keyword)
+    candidates = [
+        _candidate(rng.uniform(0, 40), rng.choice((0.0, rng.uniform(0, 150))), rng.uniform(0, 120))
+        for _ in marketplace_scores
+    ]
+    expected = _without_numpy(monkeypatch, engine._score_components, candidates, marketplace_scores)
+    assert engine._score_components(candidates, marketplace_scores) == expected
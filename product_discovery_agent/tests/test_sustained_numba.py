@@ -0,0 +1,81 @@
+"""The Numba batch kernel must reproduce compute_sustained_trend_metrics exactly."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from product_discovery_agent import sustained_numba
+from product_discovery_agent.constants import (
+    SUSTAINED_TREND_BASELINE_POINTS,
+    SUSTAINED_TREND_RECENT_POINTS,
+)
+from product_discovery_agent.sustained import compute_sustained_trend_metrics
+
+pytestmark = pytest.mark.skipif(
+    sustained_numba._metrics_batch is None,
+    reason="numba is not installed",
+)
+
+
+def _scalar(series, recent_points, baseline_points):
+    return [
+        compute_sustained_trend_metrics(
+            values=values,
+            recent_points=recent_points,
+            baseline_points=baseline_points,
+        )
+        for values in series
+    ]
+
+
+def _random_series(rng: random.Random, count: int) -> list[list[int]]:
+    series = []
+    for _ in range(count):
+        length = rng.randint(0, 60)
+        shape = rng.choice(("noise", "rising", "falling", "flat"))
+        if shape == "flat":
+            series.append([rng.randint(0, 100)] * length)
+        elif shape == "rising":
+            series.append([min(100, index * 2 + rng.randint(0, 10)) for index in range(length)])
+        elif shape == "falling":
+            series.append([max(0, 100 - index * 2 - rng.randint(0, 10)) for index in range(length)])
+        else:
+            series.append([rng.randint(0, 100) for _ in range(length)])
+    return series
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_scalar_on_random_series(seed):
+    series = _random_series(random.Random(seed), 200)
+    batch = sustained_numba.compute_sustained_trend_metrics_batch(
+        series=series,
+        recent_points=SUSTAINED_TREND_RECENT_POINTS,
+        baseline_points=SUSTAINED_TREND_BASELINE_POINTS,
+    )
+    # Dataclass equality compares every field exactly, floats included.
+    assert batch == _scalar(series, SUSTAINED_TREND_RECENT_POINTS, SUSTAINED_TREND_BASELINE_POINTS)
+
+
+@pytest.mark.parametrize(
+    ("series", "recent_points", "baseline_points"),
+    [
+        ([[]], 8, 8),
+        ([[5]], 8, 8),
+        ([[5] * 15], 8, 8),
+        ([[5] * 16], 8, 8),
+        ([[7]], 1, 0),
+        ([[7]], 0, 1),
+        ([[3, 9]], 1, 1),
+        ([[9, 3]], 1, 1),
+        ([[1, 2, 3], [], [4], [0] * 20, list(range(40))], 8, 8),
+    ],
+)
+def test_batch_matches_scalar_on_edge_cases(series, recent_points, baseline_points):
+    batch = sustained_numba.compute_sustained_trend_metrics_batch(
+        series=series,
+        recent_points=recent_points,
+        baseline_points=baseline_points,
+    )
+    assert batch == _scalar(series, recent_points, baseline_points)